@@ -0,0 +1,147 @@
+# filename: analytics.py
+import numpy as np
+import pandas as pd
+
+# """
+# This file contains the market analytics used by the Resale Transactions Explorer.
+# Months are handled as integer ordinals (year * 12 + month - 1). Monthly metrics are computed
+# with grouped operations over the whole table at once, and rolling medians are taken over the
+# pooled transactions of each window, found as slices of one sorted array and selected for
+# every window at once.
+# """
+
+# Rolling windows, in months, reported by market_trends()
+ROLLING_WINDOWS = (3, 12)
+
+
+# Function to convert 'YYYY-MM' month strings to integer month ordinals
+def month_ordinals(months):
+    # Parse each distinct month once and broadcast back through the codes
+    if isinstance(months.dtype, pd.CategoricalDtype):
+        codes = months.cat.codes.to_numpy()
+        categories = months.cat.categories.astype(str)
+    else:
+        codes, categories = pd.factorize(months.astype(str))
+        categories = pd.Index(categories)
+    years = pd.to_numeric(categories.str[:4], errors='coerce')
+    month_numbers = pd.to_numeric(categories.str[5:7], errors='coerce')
+    # Months that could not be parsed (e.g. 'Unknown' from ingest) become -1
+    ordinals = np.nan_to_num((years * 12 + month_numbers - 1).to_numpy(dtype=float), nan=-1)
+    return ordinals.astype(np.int32)[codes]
+
+
+# Function to convert integer month ordinals back to 'YYYY-MM' strings
+def ordinals_to_months(ordinals):
+    ordinals = np.asarray(ordinals)
+    unique, inverse = np.unique(ordinals, return_inverse=True)
+    labels = np.array([f"{o // 12}-{o % 12 + 1:02d}" for o in unique], dtype=object)
+    return labels[inverse]
+
+
+# Function to find the k-th smallest value (0-based) in each [start, end) range of a non-negative integer array
+def range_kth_smallest(values, starts, ends, ks):
+    # A wavelet matrix walked from the top bit down for every range at once: at each bit the
+    # values are stably split into zeros then ones, and each range follows the half holding
+    # its k-th value, so a query costs one step per bit instead of a sort of its range
+    current = values
+    result = np.zeros(len(ks), dtype=np.int64)
+    for bit in range(int(values.max(initial=0)).bit_length() - 1, -1, -1):
+        is_one = ((current >> bit) & 1).astype(bool)
+        zeros_before = np.zeros(len(current) + 1, dtype=np.int64)
+        np.cumsum(~is_one, out=zeros_before[1:])
+        n_zeros = zeros_before[-1]
+        zeros_at_start, zeros_at_end = zeros_before[starts], zeros_before[ends]
+        zeros_in_range = zeros_at_end - zeros_at_start
+        go_right = ks >= zeros_in_range
+        ks = np.where(go_right, ks - zeros_in_range, ks)
+        starts = np.where(go_right, n_zeros + starts - zeros_at_start, zeros_at_start)
+        ends = np.where(go_right, n_zeros + ends - zeros_at_end, zeros_at_end)
+        result |= go_right.astype(np.int64) << bit
+        current = np.concatenate([current[~is_one], current[is_one]])
+    return result
+
+
+# Function to compute the median price of the transactions in trailing windows of months,
+# one per (query key, window) pair
+def trailing_window_medians(keys, prices, queries):
+    # Keys are sorted, so the transactions of every window form one contiguous slice and the
+    # median is taken over the pooled transactions rather than over monthly medians
+    price_codes, unique_prices = pd.factorize(prices, sort=True)
+    starts = np.concatenate([np.searchsorted(keys, query_keys - (window - 1)) for query_keys, window in queries])
+    ends = np.concatenate([np.searchsorted(keys, query_keys, side='right') for query_keys, _ in queries])
+    counts = ends - starts
+    found = counts > 0
+
+    # The two middle values of every non-empty window, found in one pass
+    middle = np.concatenate([(counts[found] - 1) // 2, counts[found] // 2])
+    window_starts, window_ends = np.tile(starts[found], 2), np.tile(ends[found], 2)
+    middle_ranks = range_kth_smallest(price_codes, window_starts, window_ends, middle)
+    lower, upper = np.split(unique_prices[middle_ranks], 2)
+
+    medians = np.full(len(starts), np.nan)
+    medians[found] = (lower + upper) / 2
+    return np.split(medians, np.cumsum([len(query_keys) for query_keys, _ in queries])[:-1])
+
+
+# Function to number the groups of the given columns, -1 where any of them is missing
+def group_codes(frame, by):
+    # Factorizing each column and combining the codes is much cheaper than groupby().ngroup()
+    codes = np.zeros(len(frame), dtype=np.int64)
+    for column in by:
+        column_codes, uniques = pd.factorize(frame[column])
+        codes = np.where((codes < 0) | (column_codes < 0), -1, codes * len(uniques) + column_codes)
+    return codes
+
+
+# Function to compute monthly market statistics with rolling medians and year-over-year change
+def market_trends(data, by=('town', 'flat_type')):
+    by = list(by)
+    price = data['resale_price'].to_numpy(dtype=float)
+    area = data['floor_area_sqm'].to_numpy(dtype=float)
+
+    frame = pd.DataFrame({column: data[column] for column in by})
+    frame['month_ordinal'] = month_ordinals(data['month'])
+    frame['price'] = price
+    frame['price_per_sqm'] = price / np.where(area > 0, area, np.nan)
+
+    # Unknown months, prices and floor areas are filled with placeholders during ingest
+    frame['group'] = group_codes(frame, by)
+    frame = frame[
+        (frame['month_ordinal'].to_numpy() >= 0) & (frame['group'].to_numpy() >= 0) & (price > 0) & (area > 0)
+    ]
+
+    keys = by + ['month_ordinal']
+    monthly = frame.groupby(keys, observed=True).agg(
+        transactions=('price', 'size'),
+        median_price=('price', 'median'),
+        median_price_per_sqm=('price_per_sqm', 'median'),
+        group=('group', 'first'),
+    )
+    if monthly.empty:
+        return monthly.drop(columns='group').reset_index()
+
+    # One sort key per transaction, group * span + month offset. The span leaves room for the
+    # longest window and the 12-month shift, so no window reaches into the previous group.
+    first_month = int(frame['month_ordinal'].min())
+    span = int(frame['month_ordinal'].max()) - first_month + 13 + max(ROLLING_WINDOWS)
+    row_keys = frame['group'].to_numpy(dtype=np.int64) * span + (frame['month_ordinal'].to_numpy() - first_month)
+    order = np.argsort(row_keys, kind='stable')
+    row_keys, row_prices = row_keys[order], frame['price'].to_numpy()[order]
+
+    month_keys = (
+        monthly['group'].to_numpy(dtype=np.int64) * span
+        + (monthly.index.get_level_values('month_ordinal').to_numpy() - first_month)
+    )
+    # Year-over-year change uses the 3-month rolling median, which is less noisy than single
+    # months, of each month and of the same month a year earlier
+    queries = [(month_keys, window) for window in ROLLING_WINDOWS] + [(month_keys - 12, 3)]
+    *rolling, year_before = trailing_window_medians(row_keys, row_prices, queries)
+    for window, medians in zip(ROLLING_WINDOWS, rolling):
+        monthly[f'rolling_{window}m_median'] = medians
+    monthly['yoy_change'] = monthly['rolling_3m_median'] / year_before - 1
+
+    trends = monthly.drop(columns='group').reset_index()
+    trends.insert(len(by) + 1, 'month', ordinals_to_months(trends['month_ordinal']))
+    for column in by:
+        trends[column] = trends[column].astype(str)
+    return trends
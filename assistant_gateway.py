@@ -0,0 +1,142 @@
+# filename: assistant_gateway.py
+import time
+import threading
+
+# """
+# This file contains the gateway used by the HDB Assistant in front of its expensive backends
+# (the GPT call and the crew web search). Within one server process it:
+#   - coalesces identical in-flight requests into a single upstream call whose result is shared,
+#   - caps the number of concurrent upstream calls, queueing the rest up to a maximum depth,
+#   - spaces upstream calls out to a requests-per-minute budget,
+# and reports its queue depth so the page can show it.
+# """
+
+
+class GatewayBusy(Exception):
+    """Raised when the gateway's queue is full or a request waited too long."""
+
+
+class _InFlight:
+    """An upstream call shared by every request with the same key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class RateLimiter:
+    """Token bucket allowing `rate_per_minute` calls with bursts of up to `burst`."""
+
+    def __init__(self, rate_per_minute, burst):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Function to block until a call is allowed, returning the seconds waited
+    def acquire(self):
+        if self.interval == 0:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens * self.interval if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class BackendGateway:
+    """Single-flight, concurrency-limited and rate-limited access to one backend."""
+
+    def __init__(self, name, max_concurrency, rate_per_minute, max_queue, timeout=300):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.rate_limiter = RateLimiter(rate_per_minute, burst=max_concurrency)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.queued = 0
+        self.running = 0
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        self.rejected_calls = 0
+
+    # Function to call `func` for `key`, sharing the result with identical in-flight requests.
+    # Requests with no key are never shared.
+    def call(self, key, func):
+        if key is None:
+            return self._run(func)
+        with self.lock:
+            shared = self.in_flight.get(key)
+            if shared is None:
+                shared = _InFlight()
+                self.in_flight[key] = shared
+                leader = True
+            else:
+                shared.waiters += 1
+                self.coalesced_calls += 1
+                leader = False
+
+        if not leader:
+            if not shared.done.wait(self.timeout):
+                raise GatewayBusy(f"Timed out waiting for a shared {self.name} request.")
+            if shared.error is not None:
+                raise shared.error
+            return shared.result
+
+        try:
+            shared.result = self._run(func)
+        except Exception as e:
+            shared.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            shared.done.set()
+        return shared.result
+
+    # Function to run one upstream call once a slot and a rate-limit token are available
+    def _run(self, func):
+        with self.lock:
+            if self.queued >= self.max_queue:
+                self.rejected_calls += 1
+                raise GatewayBusy(f"The {self.name} service is busy. Please try again shortly.")
+            self.queued += 1
+        try:
+            acquired = self.slots.acquire(timeout=self.timeout)
+        finally:
+            with self.lock:
+                self.queued -= 1
+        if not acquired:
+            raise GatewayBusy(f"Timed out waiting for the {self.name} service.")
+
+        try:
+            self.rate_limiter.acquire()
+            with self.lock:
+                self.running += 1
+                self.upstream_calls += 1
+            return func()
+        finally:
+            with self.lock:
+                self.running -= 1
+            self.slots.release()
+
+    # Function to report the gateway's current load and counters
+    def stats(self):
+        with self.lock:
+            return {
+                "running": self.running,
+                "queued": self.queued,
+                "max_concurrency": self.max_concurrency,
+                "upstream_calls": self.upstream_calls,
+                "coalesced_calls": self.coalesced_calls,
+                "rejected_calls": self.rejected_calls,
+            }
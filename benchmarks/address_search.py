@@ -0,0 +1,39 @@
+# filename: benchmarks/address_search.py
+import time
+import numpy as np
+from benchmarks.synthetic import load_benchmark_data
+from chart_data import compact_frame
+from search_index import AddressSearchIndex
+
+# """
+# Measures the block / street search index against a str.contains scan.
+# Run from the repository root: python -m benchmarks.address_search
+# """
+
+QUERIES = ["bedok", "bedok nth", "ang mo kio ave", "blk 21", "tampines st 2", "zzz"]
+
+
+def main():
+    data = compact_frame(load_benchmark_data())
+    print(f"Rows: {len(data):,}")
+
+    start = time.perf_counter()
+    search_index = AddressSearchIndex.build(data)
+    print(f"Index build: {(time.perf_counter() - start) * 1000:.0f} ms, {len(search_index.tokens):,} tokens")
+
+    addresses = data['block'].astype(str) + ' ' + data['street_name'].astype(str)
+    for query in QUERIES:
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            rows = search_index.search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        addresses.str.contains(query.upper(), regex=False)
+        scan_ms = (time.perf_counter() - start) * 1000
+        print(f"  {query!r:<18} {len(rows):>8,} rows  index {np.median(timings):6.2f} ms  str.contains {scan_ms:6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# filename: benchmarks/chart_payloads.py
+import time
+from benchmarks.synthetic import load_benchmark_data
+from chart_data import (
+    monthly_bins, downsample_series, compact_frame,
+    arrow_payload_size, json_payload_size, MAX_CHART_POINTS, MAX_TABLE_ROWS,
+)
+
+# """
+# Measures the payload sizes and server-side preparation times of the explorer's
+# table and chart data for a full-history selection.
+# Run from the repository root: python -m benchmarks.chart_payloads
+# """
+
+
+# Function to time a callable and return its result with the elapsed milliseconds
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def format_mb(num_bytes):
+    return f"{num_bytes / 1_000_000:8.2f} MB"
+
+
+def main():
+    data = load_benchmark_data()
+    print(f"Rows: {len(data):,}")
+
+    compact, compact_ms = timed(compact_frame, data)
+    print(f"compact_frame: {compact_ms:.0f} ms")
+
+    print("\nTable payload (st.dataframe)")
+    raw_arrow, raw_arrow_ms = timed(arrow_payload_size, data)
+    compact_arrow, compact_arrow_ms = timed(arrow_payload_size, compact)
+    raw_json, raw_json_ms = timed(json_payload_size, data)
+    print(f"  JSON records, raw     {format_mb(raw_json)}  {raw_json_ms:7.0f} ms")
+    print(f"  Arrow, raw            {format_mb(raw_arrow)}  {raw_arrow_ms:7.0f} ms")
+    print(f"  Arrow, compact        {format_mb(compact_arrow)}  {compact_arrow_ms:7.0f} ms")
+    capped_arrow, capped_arrow_ms = timed(arrow_payload_size, compact.iloc[:MAX_TABLE_ROWS])
+    print(f"  Arrow, compact, capped {format_mb(capped_arrow)}  {capped_arrow_ms:6.0f} ms  (first {MAX_TABLE_ROWS:,} rows)")
+
+    print("\nChart payloads (aggregated on the server)")
+    raw_points = data[['month', 'resale_price']]
+    print(f"  raw month/price rows  {format_mb(json_payload_size(raw_points))}  (JSON, {len(raw_points):,} points)")
+
+    monthly, monthly_ms = timed(monthly_bins, compact, 'resale_price', 'median')
+    print(f"  monthly_bins          {format_mb(arrow_payload_size(monthly))}  {monthly_ms:7.0f} ms  ({len(monthly)} points)")
+
+    downsampled, lttb_ms = timed(downsample_series, monthly, 'month', 'resale_price', MAX_CHART_POINTS // 5)
+    print(f"  LTTB to {MAX_CHART_POINTS // 5:<13} {format_mb(arrow_payload_size(downsampled))}  {lttb_ms:7.0f} ms  ({len(downsampled)} points)")
+
+
+if __name__ == "__main__":
+    main()
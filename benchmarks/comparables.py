@@ -0,0 +1,58 @@
+# filename: benchmarks/comparables.py
+import time
+import numpy as np
+from benchmarks.synthetic import load_benchmark_data
+from chart_data import compact_frame
+from comparables import ComparablesIndex, brute_force_comparables
+
+# """
+# Measures comparables lookups through ComparablesIndex against a full-table scan
+# and checks that both return the same transactions.
+# Run from the repository root: python -m benchmarks.comparables
+# """
+
+N_QUERIES = 50
+
+
+def main():
+    data = compact_frame(load_benchmark_data())
+    print(f"Rows: {len(data):,}")
+
+    start = time.perf_counter()
+    comparables_index = ComparablesIndex(data)
+    print(f"Index build: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Use real rows as query flats so every query has plausible neighbours
+    rng = np.random.default_rng(0)
+    sample = data.iloc[rng.integers(0, len(data), N_QUERIES)]
+    towns = data['town'].astype(str).unique()
+
+    index_ms, scan_ms, mismatches = [], [], 0
+    for _, flat in sample.iterrows():
+        others = towns[towns != str(flat['town'])]
+        nearby = [str(flat['town'])] + list(rng.choice(others, 2, replace=False))
+        query = dict(
+            towns=nearby, flat_type=str(flat['flat_type']), floor_area_sqm=flat['floor_area_sqm'],
+            storey_range=str(flat['storey_range']), remaining_lease=flat['remaining_lease_months'] / 12,
+            flat_model=str(flat['flat_model']),
+        )
+
+        start = time.perf_counter()
+        rows, distances = comparables_index.query(**query)
+        index_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        brute_rows, brute_distances = brute_force_comparables(data, comparables_index.scales, **query)
+        scan_ms.append((time.perf_counter() - start) * 1000)
+
+        # Exact ties may be broken differently, so compare the distances rather than the rows
+        mismatches += int(len(rows) != len(brute_rows) or not np.allclose(distances, brute_distances))
+
+    print(f"Queries: {N_QUERIES} (3 towns each, top 10)")
+    print(f"  index       p50 {np.percentile(index_ms, 50):8.2f} ms  p95 {np.percentile(index_ms, 95):8.2f} ms")
+    print(f"  brute force p50 {np.percentile(scan_ms, 50):8.2f} ms  p95 {np.percentile(scan_ms, 95):8.2f} ms")
+    print(f"  result mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# filename: benchmarks/data_export.py
+import io
+import os
+import time
+import multiprocessing
+from benchmarks.synthetic import load_benchmark_data
+from chart_data import compact_frame
+from data_export import export_to_tempfile
+
+# """
+# Measures the throughput and peak memory of exporting a full-history selection, comparing
+# the chunked file export with building the whole CSV string or Parquet buffer in memory.
+# Peak memory is the rise in resident memory of a forked worker, so Arrow's allocations are
+# included. Linux only (resets the peak through /proc/self/clear_refs).
+# Run from the repository root: python -m benchmarks.data_export
+# """
+
+
+# Function to read this process's current and peak resident memory in MB
+def rss_mb():
+    values = {}
+    with open("/proc/self/status", "r") as status:
+        for line in status:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                values[line.split(":")[0]] = int(line.split()[1]) / 1024
+    return values["VmRSS"], values["VmHWM"]
+
+
+def worker(func, data, results):
+    # Reset the peak resident memory to the current value before measuring
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+    baseline, _ = rss_mb()
+    start = time.perf_counter()
+    result = func(data)
+    seconds = time.perf_counter() - start
+    results.put((result, seconds, rss_mb()[1] - baseline))
+
+
+# Function to run an export in a forked process and return its result, elapsed seconds and peak memory rise in MB
+def measured(func, data):
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    process = context.Process(target=worker, args=(func, data, results))
+    process.start()
+    measurement = results.get()
+    process.join()
+    return measurement
+
+
+def in_memory_csv(data):
+    return len(data.to_csv(index=False).encode('utf-8'))
+
+
+def in_memory_parquet(data):
+    buffer = io.BytesIO()
+    data.to_parquet(buffer, index=False, compression='zstd')
+    return buffer.tell()
+
+
+def chunked_csv(data):
+    path, stats = export_to_tempfile(data, "CSV")
+    os.remove(path)
+    return stats['bytes']
+
+
+def chunked_parquet(data):
+    path, stats = export_to_tempfile(data, "Parquet")
+    os.remove(path)
+    return stats['bytes']
+
+
+def report(label, rows, size, seconds, peak):
+    print(f"  {label:<22} {size / 1_000_000:8.1f} MB  {seconds:6.2f} s  {rows / seconds:>10,.0f} rows/s  "
+          f"{size / 1_000_000 / seconds:6.1f} MB/s  peak {peak:7.1f} MB")
+
+
+def main():
+    # The explorer exports its compact session data, so benchmark the same dtypes
+    data = compact_frame(load_benchmark_data())
+    print(f"Rows: {len(data):,}  (in memory {data.memory_usage(deep=True).sum() / 1_000_000:.1f} MB)")
+
+    for export_format, in_memory, chunked in [
+        ("CSV", in_memory_csv, chunked_csv),
+        ("Parquet", in_memory_parquet, chunked_parquet),
+    ]:
+        print(f"\n{export_format}")
+        for label, func in [("whole file in memory", in_memory), ("chunked to file", chunked)]:
+            size, seconds, peak = measured(func, data)
+            report(label, len(data), size, seconds, peak)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# filename: benchmarks/intent_router.py
+import time
+from collections import Counter
+from intent_router import route_question, OFF_TOPIC, FAQ, GENERAL, RESEARCH
+
+# """
+# Routes a labelled set of sample questions through the assistant's local first stage and reports
+# the routing accuracy, the time spent routing, and the upstream calls saved compared with sending
+# every question to both GPT and the crew.
+# Run from the repository root: python -m benchmarks.intent_router
+# """
+
+SAMPLE_QUESTIONS = [
+    ("What is the income ceiling for a 4-room BTO flat?", FAQ),
+    ("How much can my household earn to buy a BTO? What's the income limit?", FAQ),
+    ("What is the income ceiling for an executive condominium?", FAQ),
+    ("Is there a maximum salary for EC buyers?", FAQ),
+    ("What is the minimum age to apply for a BTO flat?", FAQ),
+    ("How old must I be to buy an HDB flat as a single?", FAQ),
+    ("Can singles apply for a BTO?", FAQ),
+    ("Am I eligible for a BTO flat?", FAQ),
+    ("What are the eligibility criteria for buying an HDB flat?", FAQ),
+    ("What are the new BTO launches in 2025?", RESEARCH),
+    ("When is the next BTO sales exercise launch?", RESEARCH),
+    ("What is the latest income ceiling for HDB flats?", RESEARCH),
+    ("Have the CPF housing grant amounts changed recently?", RESEARCH),
+    ("What are the upcoming BTO projects in Tengah?", RESEARCH),
+    ("What is the current HDB loan interest rate?", RESEARCH),
+    ("How do I apply for an HDB resale flat?", GENERAL),
+    ("What grants are available for first-time buyers?", GENERAL),
+    ("What is the minimum occupation period for HDB flats?", GENERAL),
+    ("Can I rent out my HDB flat?", GENERAL),
+    ("How does the BTO ballot work?", GENERAL),
+    ("Am I eligible for the Enhanced CPF Housing Grant?", GENERAL),
+    ("What is the difference between an HDB loan and a bank loan?", GENERAL),
+    ("How long is the lease of an HDB flat?", GENERAL),
+    ("Is an old flat in Toa Payoh a good buy?", GENERAL),
+    ("What is the minimum occupation period?", GENERAL),
+    ("Can PRs apply?", GENERAL),
+    ("What is the Ethnic Integration Policy?", GENERAL),
+    ("What is the HFE letter?", GENERAL),
+    ("Can I apply for a 2-room Flexi at age 55?", GENERAL),
+    ("How old must I be to apply?", FAQ),
+    ("How much can I earn?", FAQ),
+    ("What is the capital of France?", OFF_TOPIC),
+    ("Write me a poem about cats", OFF_TOPIC),
+    ("How do I reset my laptop password?", OFF_TOPIC),
+    ("Who won the football match yesterday?", OFF_TOPIC),
+    ("hello", OFF_TOPIC),
+    ("Hi there!", OFF_TOPIC),
+    ("Can I keep a dog?", GENERAL),
+    ("Are cats allowed in my unit?", GENERAL),
+    ("What's the postal code for my block?", GENERAL),
+    ("What is the code of conduct for neighbours?", GENERAL),
+    ("Hi, how long is the waiting time for keys?", GENERAL),
+    ("Hey, when can I collect my keys?", GENERAL),
+    ("Give me a recipe for chicken rice", OFF_TOPIC),
+]
+
+# Upstream calls made per question for each intent: GPT, plus the crew for research
+UPSTREAM_CALLS = {OFF_TOPIC: 0, FAQ: 0, GENERAL: 1, RESEARCH: 2}
+
+
+def main():
+    repeats = 1000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        routes = [route_question(question) for question, _ in SAMPLE_QUESTIONS]
+    per_question_us = (time.perf_counter() - start) / (repeats * len(SAMPLE_QUESTIONS)) * 1_000_000
+
+    correct = 0
+    for (question, expected), route in zip(SAMPLE_QUESTIONS, routes):
+        if route.intent == expected:
+            correct += 1
+        else:
+            print(f"  misrouted: {question!r} -> {route.intent} (expected {expected})")
+
+    intents = Counter(route.intent for route in routes)
+    before = 2 * len(SAMPLE_QUESTIONS)
+    after = sum(UPSTREAM_CALLS[route.intent] for route in routes)
+    print(f"Questions: {len(SAMPLE_QUESTIONS)}  routed correctly: {correct}/{len(SAMPLE_QUESTIONS)}")
+    print(f"Routing time: {per_question_us:.1f} us per question")
+    print("Intents: " + ", ".join(f"{intent} {intents[intent]}" for intent in (OFF_TOPIC, FAQ, GENERAL, RESEARCH)))
+    print(f"Upstream calls: {before} without routing, {after} with routing ({1 - after / before:.0%} fewer)")
+    print(f"Answered locally without an upstream call: {intents[OFF_TOPIC] + intents[FAQ]}/{len(SAMPLE_QUESTIONS)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+# filename: benchmarks/load_test.py
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from tornado.websocket import websocket_connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+# """
+# Load-test harness for the Streamlit app. It starts real `streamlit run` server processes and
+# drives them over Streamlit's websocket protocol, as browsers do, simulating concurrent sessions
+# that log in, open the explorer, apply filters, search the table and ask the assistant. Each
+# server keeps its own runtime and caches, so cached analytics are computed once per process,
+# as in production. Sessions read a synthetic resale dataset and the servers talk to a local
+# mock of the OpenAI API, so no network access or API key is needed for the explorer and GPT steps.
+#
+# The first session on each server runs before the others and is reported separately, since
+# it fills the per-process caches.
+#
+# --page explorer runs the explorer page on its own, without the login or the assistant, for
+# environments where the assistant's dependencies (crewai, pysqlite3) are not installed.
+# The crew's WebsiteSearchTool indexes https://www.hdb.gov.sg/ when hdb_assistant is first
+# imported, so runs with --assistant need that site to be reachable.
+#
+# Run from the repository root, e.g.:
+#   python -m benchmarks.load_test --sessions 20 --processes 2 --rows 200000 --assistant
+#   python -m benchmarks.load_test --sessions 20 --processes 2 --page explorer
+# """
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "streamlit_app.py")
+PASSWORD = "load-test"
+
+# Entry script for --page explorer, written to the working directory
+EXPLORER_SCRIPT = f"""import sys
+sys.path.insert(0, {REPO_ROOT!r})
+from tabs import resale_transactions_explorer
+resale_transactions_explorer.display()
+"""
+
+QUESTIONS = [
+    "What is the income ceiling for a 4-room BTO flat?",
+    "How do I apply for an HDB resale flat?",
+    "What grants are available for first-time buyers?",
+    "What is the minimum occupation period for HDB flats?",
+]
+
+# Mock completions use the ReAct final-answer format so the crew agents accept them too
+MOCK_ANSWER = "Thought: I now can give a great answer\nFinal Answer: Answer: This is a mock response for load testing."
+EMBEDDING_DIMENSIONS = 1536
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible endpoint for chat completions and embeddings."""
+
+    latency = 0.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(self.latency)
+        if self.path.endswith("/chat/completions"):
+            payload = {
+                "id": "chatcmpl-load-test", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "gpt-3.5-turbo"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": MOCK_ANSWER}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+            }
+        elif self.path.endswith("/embeddings"):
+            inputs = body.get("input", [])
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            payload = {
+                "object": "list", "model": body.get("model", "text-embedding-ada-002"),
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": [0.0] * EMBEDDING_DIMENSIONS}
+                    for i in range(len(inputs))
+                ],
+                "usage": {"prompt_tokens": 1, "total_tokens": 1},
+            }
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+# Function to start the mock OpenAI server in a background thread, returning its base URL
+def start_mock_openai(latency):
+    MockOpenAIHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+# Function to write a synthetic dataset ZIP into the working directory used by the app
+def prepare_workdir(n_rows):
+    from benchmarks.synthetic import make_resale_data
+    from tabs import resale_transactions_explorer
+
+    workdir = tempfile.mkdtemp(prefix="hdb_load_test_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        resale_transactions_explorer.save_data_to_zip(make_resale_data(n_rows=n_rows))
+    finally:
+        os.chdir(cwd)
+    os.symlink(os.path.join(REPO_ROOT, "images"), os.path.join(workdir, "images"))
+    os.makedirs(os.path.join(workdir, ".streamlit"))
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as secrets_file:
+        secrets_file.write(f'password = "{PASSWORD}"\nOPENAI_API_KEY = "sk-load-test"\n')
+    with open(os.path.join(workdir, "explorer_app.py"), "w") as script_file:
+        script_file.write(EXPLORER_SCRIPT)
+    return workdir
+
+
+# Function to read the current and peak resident memory of a process in MB
+def process_memory_mb(pid):
+    values = {}
+    with open(f"/proc/{pid}/status", "r") as status:
+        for line in status:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                values[line.split(":")[0]] = int(line.split()[1]) / 1024
+    return values.get("VmRSS", float("nan")), values.get("VmHWM", float("nan"))
+
+
+# Function to find a free local TCP port
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+# Function to start one `streamlit run` server process, returning (process, port, log path)
+def start_server(script, workdir, base_url, index):
+    port = free_port()
+    log_path = os.path.join(workdir, f"server_{index}.log")
+    env = dict(
+        os.environ,
+        OPENAI_BASE_URL=base_url, OPENAI_API_BASE=base_url, OPENAI_API_KEY="sk-load-test",
+        PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])),
+        # Log the session memory line on every access, so the last one reflects the end of the run
+        HDB_SESSION_MEMORY_LOG_SECONDS="0",
+    )
+    with open(log_path, "w") as log_file:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", script,
+             "--server.headless", "true", "--server.address", "127.0.0.1", "--server.port", str(port),
+             "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+            cwd=workdir, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+        )
+    return process, port, log_path
+
+
+# Function to wait until a server answers its health check
+def wait_until_healthy(process, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server on port {port} exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"server on port {port} did not become healthy in {timeout:.0f} s")
+
+
+# Function to read the last session memory line a server logged
+def last_session_memory_line(log_path):
+    line = None
+    with open(log_path, "r", errors="replace") as log_file:
+        for log_line in log_file:
+            if "session_memory pid=" in log_line:
+                line = log_line
+    return line.split("session_memory ", 1)[1].strip() if line else "no session memory logged"
+
+
+class BrowserSession:
+    """One simulated browser tab speaking Streamlit's websocket protocol."""
+
+    def __init__(self, port, timeout):
+        self.url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        self.timeout = timeout
+        self.connection = None
+        # Widget protos of the latest run by label, and the widget values the browser would send
+        self.widgets = {}
+        self.widget_states = {}
+        # Large messages already received are later sent as references to their hash
+        self.messages_by_hash = {}
+
+    async def connect(self):
+        self.connection = await websocket_connect(self.url, subprotocols=["streamlit"], max_message_size=1 << 30)
+
+    # Function to rerun the script with the current widget values plus a one-off trigger,
+    # returning the seconds until the run finished and the bytes received
+    async def run(self, trigger_id=None):
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.query_string = ""
+        client_state.page_script_hash = ""
+        for state in self.widget_states.values():
+            client_state.widget_states.widgets.append(state)
+        if trigger_id is not None:
+            client_state.widget_states.widgets.append(WidgetState(id=trigger_id, trigger_value=True))
+
+        start = time.perf_counter()
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+        received, widgets, exceptions = 0, {}, []
+        while True:
+            data = await asyncio.wait_for(self.connection.read_message(), self.timeout)
+            if data is None:
+                raise ConnectionError("server closed the connection")
+            received += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            if forward.WhichOneof("type") == "ref_hash":
+                forward = self.messages_by_hash[forward.ref_hash]
+            elif forward.hash:
+                self.messages_by_hash[forward.hash] = forward
+
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                widget = getattr(element, element_type) if element_type else None
+                if element_type == "exception":
+                    exceptions.append(element.exception.message)
+                elif widget is not None and hasattr(widget, "id") and hasattr(widget, "label"):
+                    widgets[widget.label] = widget
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        elapsed = time.perf_counter() - start
+
+        if exceptions:
+            raise RuntimeError(exceptions[0])
+        # Like the browser, only send values for widgets shown in the latest run
+        self.widgets = widgets
+        live_ids = {widget.id for widget in widgets.values()}
+        self.widget_states = {key: state for key, state in self.widget_states.items() if key in live_ids}
+        return elapsed, received
+
+    def _widget(self, label):
+        matches = [widget for widget_label, widget in self.widgets.items() if label in widget_label]
+        if not matches:
+            raise KeyError(f"no widget labelled {label!r} in the latest run")
+        return matches[0]
+
+    # Function to set the options selected in a multiselect, sent with the next run
+    def select(self, label, options):
+        widget = self._widget(label)
+        indices = [list(widget.options).index(option) for option in options]
+        state = WidgetState(id=widget.id)
+        state.int_array_value.data.extend(indices)
+        self.widget_states[widget.id] = state
+
+    # Function to set the text of a text input or text area, sent with the next run
+    def type_text(self, label, text):
+        widget = self._widget(label)
+        self.widget_states[widget.id] = WidgetState(id=widget.id, string_value=text)
+
+    # Function to click a button or form submit button, running the script
+    async def click(self, label):
+        return await self.run(trigger_id=self._widget(label).id)
+
+    async def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+# Function to run one simulated user session, returning (step, seconds, bytes received) tuples
+async def run_session(session_id, port, page, assistant, timeout):
+    rng = random.Random(session_id)
+    session = BrowserSession(port, timeout)
+    timings = []
+
+    async def step(name, action):
+        seconds, received = await action()
+        timings.append((name, seconds, received))
+
+    try:
+        await session.connect()
+        # Open the app and log in; the explorer is the landing page
+        await step("open_app", session.run)
+        if page == "app":
+            session.type_text("Password", PASSWORD)
+            await step("login_and_explorer", session.run)
+
+        async def apply_filters():
+            session.select("Select Town", [rng.choice(list(session._widget("Select Town").options))])
+            session.select("Select Flat Type", [rng.choice(list(session._widget("Select Flat Type").options))])
+            return await session.click("Apply Filters")
+        await step("apply_filters", apply_filters)
+
+        # st.dataframe pages and sorts in the browser, so the server-side cost of "paging" is
+        # re-rendering a different row selection; the search box produces one
+        async def search_table():
+            session.type_text("Search Block / Street", rng.choice(["AVE", "ST", "RD", "1"]))
+            return await session.click("Apply Filters")
+        await step("search_table", search_table)
+
+        if assistant and page == "app":
+            await step("open_assistant", lambda: session.click("HDB Assistant"))
+
+            async def ask_assistant():
+                session.type_text("Ask any HDB related question", rng.choice(QUESTIONS))
+                return await session.click("Submit")
+            await step("ask_assistant", ask_assistant)
+    finally:
+        await session.close()
+    return timings
+
+
+# Function to run sessions concurrently, returning their timings and errors
+async def run_sessions(session_ports, page, assistant, timeout):
+    outcomes = await asyncio.gather(
+        *(run_session(session_id, port, page, assistant, timeout) for session_id, port in session_ports),
+        return_exceptions=True
+    )
+    results, errors = [], []
+    for (session_id, _), outcome in zip(session_ports, outcomes):
+        if isinstance(outcome, BaseException):
+            errors.append(f"session {session_id}: {type(outcome).__name__}: {outcome}")
+        else:
+            results.append(outcome)
+    return results, errors
+
+
+# Function to print latency percentiles and mean bytes received per step
+def report_steps(title, results):
+    steps = {}
+    for timings in results:
+        for name, seconds, received in timings:
+            steps.setdefault(name, []).append((seconds, received))
+    print(f"\n{title}")
+    print(f"{'step':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'recv MB':>10}")
+    for name, values in steps.items():
+        seconds = np.array([value[0] for value in values]) * 1000
+        received = np.mean([value[1] for value in values]) / 1_000_000
+        print(f"{name:<20}{len(seconds):>7}{np.percentile(seconds, 50):>10.0f}{np.percentile(seconds, 95):>10.0f}"
+              f"{np.percentile(seconds, 99):>10.0f}{seconds.max():>10.0f}{received:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent sessions against streamlit_app.py")
+    parser.add_argument("--sessions", type=int, default=10, help="total concurrent sessions")
+    parser.add_argument("--processes", type=int, default=1, help="server processes to spread sessions over")
+    parser.add_argument("--rows", type=int, default=200_000, help="rows in the synthetic dataset")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds the mock OpenAI API takes per call")
+    parser.add_argument("--page", choices=["app", "explorer"], default="app",
+                        help="run the full app, or the explorer page on its own")
+    parser.add_argument("--assistant", action="store_true", help="include the HDB Assistant steps (full app only)")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds allowed per script run")
+    parser.add_argument("--keep-workdir", action="store_true", help="keep the dataset and server logs afterwards")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_openai(args.llm_latency)
+    workdir = prepare_workdir(args.rows)
+    script = APP_PATH if args.page == "app" else os.path.join(workdir, "explorer_app.py")
+    print(f"Synthetic dataset: {args.rows:,} rows in {workdir}")
+    print(f"Mock OpenAI API: {base_url}")
+
+    servers = []
+    try:
+        for i in range(args.processes):
+            servers.append(start_server(script, workdir, base_url, i))
+        for process, port, _ in servers:
+            wait_until_healthy(process, port, timeout=120)
+        ports = [port for _, port, _ in servers]
+        rss_start = [process_memory_mb(process.pid)[0] for process, _, _ in servers]
+
+        # One session per server first, so the measured sessions find the caches filled
+        warm_results, warm_errors = asyncio.run(run_sessions(
+            [(-1 - i, port) for i, port in enumerate(ports)], args.page, args.assistant, args.timeout
+        ))
+        session_ports = [(session_id, ports[session_id % len(ports)]) for session_id in range(args.sessions)]
+        start = time.perf_counter()
+        results, errors = asyncio.run(run_sessions(session_ports, args.page, args.assistant, args.timeout))
+        wall = time.perf_counter() - start
+
+        print(f"\nSessions: {len(results)}/{args.sessions} completed in {wall:.1f} s "
+              f"({len(results) / wall:.2f} sessions/s over {args.processes} process(es))")
+        report_steps("First session per process (fills the caches)", warm_results)
+        report_steps(f"{args.sessions} concurrent sessions", results)
+
+        print("\nPer-process memory")
+        for (process, port, log_path), start_mb in zip(servers, rss_start):
+            rss, peak = process_memory_mb(process.pid)
+            print(f"  server :{port}: RSS {start_mb:.0f} MB at start -> {rss:.0f} MB (peak {peak:.0f} MB)")
+            print(f"    {last_session_memory_line(log_path)}")
+        for error in warm_errors + errors:
+            print(f"  error: {error}")
+    finally:
+        for process, _, _ in servers:
+            process.terminate()
+        for process, _, _ in servers:
+            process.wait(timeout=30)
+        server.shutdown()
+        if args.keep_workdir:
+            print(f"\nKept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
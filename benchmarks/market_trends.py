@@ -0,0 +1,26 @@
+# filename: benchmarks/market_trends.py
+import time
+from benchmarks.synthetic import load_benchmark_data
+from chart_data import compact_frame
+from analytics import market_trends
+
+# """
+# Measures market_trends() over the full history for each grouping used by the explorer.
+# Run from the repository root: python -m benchmarks.market_trends
+# """
+
+
+def main():
+    data = compact_frame(load_benchmark_data())
+    print(f"Rows: {len(data):,}")
+
+    for by in [(), ('town',), ('flat_type',), ('town', 'flat_type')]:
+        start = time.perf_counter()
+        trends = market_trends(data, by)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        label = ', '.join(by) or 'all towns'
+        print(f"  {label:<20} {len(trends):>8,} rows  {elapsed_ms:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# filename: benchmarks/price_model.py
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import load_benchmark_data
+from chart_data import compact_frame
+from price_model import PriceModel
+
+# """
+# Measures the training time of the resale price model on a full-history table, its error on
+# held-out transactions, and how many listings per second batch scoring handles.
+# Run from the repository root: python -m benchmarks.price_model
+# """
+
+# Time spent scoring each batch size
+SCORING_SECONDS = 1.0
+
+
+# Function to turn transactions into listings, the form the scoring API accepts
+def as_listings(data):
+    return pd.DataFrame({
+        'town': data['town'].astype(str).to_numpy(),
+        'flat_type': data['flat_type'].astype(str).to_numpy(),
+        'storey_range': data['storey_range'].astype(str).to_numpy(),
+        'flat_model': data['flat_model'].astype(str).to_numpy(),
+        'floor_area_sqm': data['floor_area_sqm'].to_numpy(),
+        'remaining_lease': data['remaining_lease_months'].to_numpy() / 12,
+        'month': data['month'].astype(str).to_numpy(),
+    })
+
+
+def main():
+    data = compact_frame(load_benchmark_data())
+    print(f"Rows: {len(data):,}")
+
+    start = time.perf_counter()
+    model = PriceModel.train(data, "benchmark")
+    print(f"\nTraining on all rows: {time.perf_counter() - start:.2f} s  "
+          f"({model.stats['n_features']} coefficients, in-sample median error {model.stats['median_abs_pct_error']:.1f}%)")
+
+    # Hold out a random 10% of transactions to measure the error on unseen rows
+    rng = np.random.default_rng(0)
+    holdout = rng.random(len(data)) < 0.1
+    holdout_model = PriceModel.train(data[~holdout], "holdout")
+    actual = data['resale_price'].to_numpy(dtype=float)[holdout]
+    errors = np.abs(holdout_model.predict(as_listings(data[holdout])) / actual - 1) * 100
+    print(f"Held-out error on {holdout.sum():,} rows: median {np.median(errors):.1f}%, "
+          f"mean {errors.mean():.1f}%, p90 {np.percentile(errors, 90):.1f}%")
+
+    print("\nBatch scoring")
+    listings = as_listings(data)
+    for batch_size in (1, 1_000, 10_000, 100_000, len(listings)):
+        batch = listings.iloc[:batch_size]
+        # Repeat each batch size until about a second has passed, always at least once
+        repeats = 0
+        start = time.perf_counter()
+        while repeats == 0 or time.perf_counter() - start < SCORING_SECONDS:
+            model.predict(batch)
+            repeats += 1
+        seconds = (time.perf_counter() - start) / repeats
+        print(f"  {batch_size:>9,} listings  {seconds * 1000:9.2f} ms  {batch_size / seconds:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
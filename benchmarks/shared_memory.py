@@ -0,0 +1,72 @@
+# filename: benchmarks/shared_memory.py
+import os
+import sys
+import shutil
+import tempfile
+import multiprocessing
+from benchmarks.synthetic import load_benchmark_data
+from chart_data import compact_frame
+from shared_data import publish_shared_data, attach_shared_data
+
+# """
+# Compares the private memory of worker processes that each load their own copy of the
+# dataset with workers that attach the shared copy. Linux only (reads /proc/self/smaps_rollup).
+# Run from the repository root: python -m benchmarks.shared_memory [n_workers]
+# """
+
+
+# Function to read this process's private and proportional memory in MB
+def memory_mb():
+    values = {}
+    with open("/proc/self/smaps_rollup", "r") as smaps:
+        for line in smaps:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                values[parts[0][:-1]] = int(parts[1]) / 1024
+    return values["Rss"], values["Pss"], values["Private_Clean"] + values["Private_Dirty"]
+
+
+def private_worker(results):
+    data = compact_frame(load_benchmark_data())
+    data['resale_price'].sum()
+    results.put(("private copy", memory_mb()))
+
+
+def shared_worker(base_dir, results):
+    data = attach_shared_data(base_dir)
+    # Touch every column so the mapped pages are resident
+    for column in data.columns:
+        len(data[column].unique())
+    results.put(("shared attach", memory_mb()))
+
+
+def run(target, args, n_workers):
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=target, args=args + (results,)) for _ in range(n_workers)]
+    for worker in workers:
+        worker.start()
+    measurements = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return measurements
+
+
+def main():
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    base_dir = tempfile.mkdtemp(dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    publish_shared_data(compact_frame(load_benchmark_data()), "benchmark", base_dir)
+
+    for label, target, args in [
+        ("private copy", private_worker, ()),
+        ("shared attach", shared_worker, (base_dir,)),
+    ]:
+        measurements = run(target, args, n_workers)
+        private_total = sum(private for _, (_, _, private) in measurements)
+        pss_total = sum(pss for _, (_, pss, _) in measurements)
+        print(f"{label:<14} {n_workers} workers  private {private_total:8.1f} MB  PSS {pss_total:8.1f} MB")
+
+    shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# filename: benchmarks/synthetic.py
+import os
+import zipfile
+import pickle
+import numpy as np
+import pandas as pd
+
+# """
+# Synthetic resale transactions used by the benchmark scripts.
+# The columns and dtypes follow the cleaned table returned by fetch_full_data(),
+# so the benchmarks can run without network access to data.gov.sg.
+# """
+
+LOCAL_DATA_ZIP_PATH = "resale_data.zip"
+PICKLE_FILE_NAME = "resale_data.pkl"
+
+TOWNS = [
+    "ANG MO KIO", "BEDOK", "BISHAN", "BUKIT BATOK", "BUKIT MERAH", "BUKIT PANJANG",
+    "BUKIT TIMAH", "CENTRAL AREA", "CHOA CHU KANG", "CLEMENTI", "GEYLANG", "HOUGANG",
+    "JURONG EAST", "JURONG WEST", "KALLANG/WHAMPOA", "MARINE PARADE", "PASIR RIS",
+    "PUNGGOL", "QUEENSTOWN", "SEMBAWANG", "SENGKANG", "SERANGOON", "TAMPINES",
+    "TOA PAYOH", "WOODLANDS", "YISHUN",
+]
+FLAT_TYPES = ["1 ROOM", "2 ROOM", "3 ROOM", "4 ROOM", "5 ROOM", "EXECUTIVE", "MULTI GENERATION"]
+FLAT_TYPE_WEIGHTS = [0.005, 0.02, 0.32, 0.38, 0.22, 0.05, 0.005]
+FLAT_TYPE_AREA = [31, 45, 68, 95, 118, 145, 160]
+FLAT_MODELS = [
+    "IMPROVED", "NEW GENERATION", "MODEL A", "STANDARD", "SIMPLIFIED", "PREMIUM APARTMENT",
+    "MAISONETTE", "APARTMENT", "MODEL A2", "DBSS", "TYPE S1", "ADJOINED FLAT",
+]
+STOREY_RANGES = [f"{low:02d} TO {low + 2:02d}" for low in range(1, 50, 3)]
+STREET_WORDS = ["AVE", "ST", "RD", "DR", "CRES", "CTRL", "NTH", "STH"]
+
+
+# Function to generate a cleaned resale table with realistic shapes and cardinalities
+def make_resale_data(n_rows=900_000, seed=0):
+    rng = np.random.default_rng(seed)
+
+    month_ordinals = np.arange(1990 * 12, 2024 * 12 + 10)
+    months = np.array([f"{m // 12}-{m % 12 + 1:02d}" for m in month_ordinals], dtype=object)
+    # Sorted newest first, matching fetch_full_data()
+    month_idx = np.sort(rng.integers(0, len(month_ordinals), n_rows))[::-1]
+
+    town_idx = rng.integers(0, len(TOWNS), n_rows)
+    flat_type_idx = rng.choice(len(FLAT_TYPES), n_rows, p=FLAT_TYPE_WEIGHTS)
+    floor_area = np.round(np.array(FLAT_TYPE_AREA)[flat_type_idx] * rng.normal(1.0, 0.08, n_rows))
+
+    # Roughly 9k distinct block/street pairs, shared across towns
+    streets = np.array([
+        f"{TOWNS[t]} {STREET_WORDS[s % len(STREET_WORDS)]} {s + 1}"
+        for t in range(len(TOWNS)) for s in range(12)
+    ], dtype=object)
+    street_idx = town_idx * 12 + rng.integers(0, 12, n_rows)
+    blocks = pd.Series(rng.integers(1, 15, n_rows) + (street_idx % 12) * 30).astype(str)
+    blocks = blocks + np.where(rng.random(n_rows) < 0.1, "A", "")
+
+    lease_commence = rng.integers(1966, 2020, n_rows)
+    year = month_ordinals[month_idx] // 12
+    lease_commence = np.minimum(lease_commence, year)
+    remaining_months = 99 * 12 - (month_ordinals[month_idx] - lease_commence * 12)
+    remaining_years = remaining_months // 12
+
+    storey_idx = np.minimum(rng.geometric(0.25, n_rows) - 1, len(STOREY_RANGES) - 1)
+
+    base_price = 1_500 * floor_area * (1 + 0.04 * (year - 1990))
+    resale_price = np.round(
+        base_price * (1 + 0.01 * storey_idx) * (0.6 + 0.4 * remaining_years / 99)
+        * rng.lognormal(0, 0.12, n_rows), -3,
+    )
+
+    data = pd.DataFrame({
+        'month': months[month_idx],
+        'town': np.array(TOWNS, dtype=object)[town_idx],
+        'flat_type': np.array(FLAT_TYPES, dtype=object)[flat_type_idx],
+        'block': blocks.to_numpy(),
+        'street_name': streets[street_idx],
+        'storey_range': np.array(STOREY_RANGES, dtype=object)[storey_idx],
+        'floor_area_sqm': floor_area.astype(float),
+        'flat_model': np.array(FLAT_MODELS, dtype=object)[rng.integers(0, len(FLAT_MODELS), n_rows)],
+        'lease_commence_date': lease_commence.astype(int),
+        'remaining_lease': remaining_years.astype(int),
+        'remaining_lease_months': remaining_months.astype(np.int16),
+        'resale_price': resale_price.astype(float),
+    })
+    return data
+
+
+# Function to load the local dataset if it has been fetched, else fall back to synthetic data
+def load_benchmark_data(n_rows=900_000, seed=0):
+    if os.path.exists(LOCAL_DATA_ZIP_PATH):
+        with zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'r') as zip_ref:
+            with zip_ref.open(PICKLE_FILE_NAME) as pkl_file:
+                return pickle.load(pkl_file)
+    return make_resale_data(n_rows=n_rows, seed=seed)
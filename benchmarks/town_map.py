@@ -0,0 +1,49 @@
+# filename: benchmarks/town_map.py
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import load_benchmark_data
+from chart_data import compact_frame
+from town_map import town_price_cells, town_price_summary, TOWN_COORDINATES
+
+# """
+# Measures the once-per-version aggregation behind the town price map, the time to re-aggregate
+# it for a filter, and the map payload compared with sending one point per transaction.
+# Run from the repository root: python -m benchmarks.town_map
+# """
+
+
+def main():
+    data = compact_frame(load_benchmark_data())
+    print(f"Rows: {len(data):,}")
+
+    start = time.perf_counter()
+    cells = town_price_cells(data)
+    print(f"town_price_cells (once per version): {(time.perf_counter() - start) * 1000:.0f} ms, {len(cells):,} cells")
+
+    filters = [
+        ("all transactions", {}),
+        ("2015 - 2024", {'years': (2015, 2024)}),
+        ("4 ROOM, 2015 - 2024", {'years': (2015, 2024), 'flat_types': ['4 ROOM']}),
+        ("3 towns, 5 ROOM", {'towns': ['BEDOK', 'TAMPINES', 'PASIR RIS'], 'flat_types': ['5 ROOM']}),
+    ]
+    print("\nRe-aggregation per filter")
+    for label, kwargs in filters:
+        start = time.perf_counter()
+        summary = town_price_summary(cells, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        payload = len(summary.to_json(orient='records'))
+        print(f"  {label:<22} {elapsed:6.1f} ms  {len(summary):3d} towns  {payload / 1000:8.1f} KB")
+
+    # One point per transaction at its town's coordinates, as a raw-row map layer would need
+    coordinates = np.array([TOWN_COORDINATES.get(town, (np.nan, np.nan)) for town in data['town'].astype(str)])
+    raw_points = pd.DataFrame({
+        'latitude': coordinates[:, 0],
+        'longitude': coordinates[:, 1],
+        'resale_price': data['resale_price'].to_numpy(),
+    })
+    print(f"\nRaw transaction points: {len(raw_points.to_json(orient='records')) / 1_000_000:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
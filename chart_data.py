@@ -0,0 +1,105 @@
+# filename: chart_data.py
+import io
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# """
+# This file contains the chart-data layer used by the Resale Transactions Explorer.
+# Charts and tables are aggregated or downsampled on the server before they are
+# serialized, so the browser never receives the raw transaction rows for a chart.
+# """
+
+# Maximum number of points sent to the browser for a single time series
+MAX_CHART_POINTS = 500
+
+# Maximum number of rows sent to the browser in a table; exports have every row
+MAX_TABLE_ROWS = 100_000
+
+# Object columns with at most this share of distinct values are dictionary-encoded
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+# Function to aggregate a value column into monthly bins
+def monthly_bins(data, value='resale_price', agg='median'):
+    # 'month' is stored as 'YYYY-MM' so it can be grouped on directly without parsing dates
+    binned = data.groupby('month', observed=True)[value].agg([agg, 'count']).reset_index()
+    binned.columns = ['month', value, 'count']
+    binned['month'] = binned['month'].astype(str)
+    return binned.sort_values('month').reset_index(drop=True)
+
+
+# Function to select the indices of the points kept by Largest-Triangle-Three-Buckets downsampling
+def lttb_indices(x, y, n_out):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Always keep the first and last points; split the rest into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Pick the point forming the largest triangle with the previous pick and the next average
+        areas = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(areas))
+        selected[i + 1] = prev
+
+    return selected
+
+
+# Function to downsample a sorted time series DataFrame for charting
+def downsample_series(df, x, y, max_points=MAX_CHART_POINTS):
+    if len(df) <= max_points:
+        return df
+    x_values = df[x]
+    if not pd.api.types.is_numeric_dtype(x_values):
+        # Ordinal position is enough for evenly spaced months
+        x_values = np.arange(len(df))
+    return df.iloc[lttb_indices(x_values, df[y], max_points)].reset_index(drop=True)
+
+
+# Function to shrink a DataFrame before handing it to st.dataframe
+def compact_frame(data):
+    # Repeated strings become Arrow dictionary columns and numbers use the narrowest dtype
+    compact = {}
+    for column in data.columns:
+        series = data[column]
+        if series.dtype == object and len(series) > 0:
+            if series.nunique(dropna=False) <= len(series) * CATEGORY_MAX_UNIQUE_RATIO:
+                series = series.astype('category')
+        elif pd.api.types.is_integer_dtype(series):
+            series = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series):
+            series = pd.to_numeric(series, downcast='float')
+        compact[column] = series
+    return pd.DataFrame(compact, index=data.index)
+
+
+# Function to measure the Arrow IPC payload size of a DataFrame in bytes
+def arrow_payload_size(data):
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.tell()
+
+
+# Function to measure the JSON (records) payload size of a DataFrame in bytes
+def json_payload_size(data):
+    return len(data.to_json(orient='records').encode('utf-8'))
@@ -0,0 +1,164 @@
+# filename: comparables.py
+import numpy as np
+import pandas as pd
+from analytics import month_ordinals
+
+# """
+# This file contains the comparable-transactions lookup used by the Resale Transactions Explorer.
+# Rows are pre-sorted into (town, flat_type) blocks ordered by floor area, so a query binary
+# searches a floor-area window inside the requested blocks and ranks only those candidates.
+# """
+
+# Default search settings for a comparables query
+DEFAULT_K = 10
+DEFAULT_MONTHS_BACK = 24
+DEFAULT_AREA_TOLERANCE = 0.15
+
+# Distance added when the flat model differs, in standard deviations of the numeric features
+FLAT_MODEL_PENALTY = 1.0
+
+
+# Function to convert storey ranges such as '10 TO 12' to their middle storey
+def storey_midpoints(storey_range):
+    codes, categories = pd.factorize(storey_range.astype(str))
+    bounds = pd.Index(categories).str.extract(r'(\d+)\s*TO\s*(\d+)').astype(float)
+    midpoints = ((bounds[0] + bounds[1]) / 2).to_numpy()
+    return midpoints[codes]
+
+
+# Function to compute the numeric features used to rank comparables
+def comparable_features(data):
+    return {
+        'floor_area_sqm': data['floor_area_sqm'].to_numpy(dtype=np.float32),
+        'storey': storey_midpoints(data['storey_range']).astype(np.float32),
+        # Remaining lease in years, at month precision
+        'remaining_lease': data['remaining_lease_months'].to_numpy(dtype=np.float32) / 12,
+    }
+
+
+# Function to compute the distances between a query flat and candidate rows
+def comparable_distances(features, scales, query, flat_models, query_flat_model):
+    distance = np.zeros(len(flat_models), dtype=np.float32)
+    for name, values in features.items():
+        distance += ((values - query[name]) / scales[name]) ** 2
+    distance = np.sqrt(distance)
+    if query_flat_model:
+        distance += FLAT_MODEL_PENALTY * (flat_models != query_flat_model)
+    return distance
+
+
+# Function to summarise the price distribution of a set of comparables
+def price_distribution(comparables):
+    prices = comparables['resale_price']
+    if prices.empty:
+        return {}
+    return {
+        'count': int(len(prices)),
+        'min': float(prices.min()),
+        'p25': float(prices.quantile(0.25)),
+        'median': float(prices.median()),
+        'p75': float(prices.quantile(0.75)),
+        'max': float(prices.max()),
+        'median_price_per_sqm': float((prices / comparables['floor_area_sqm']).median()),
+    }
+
+
+class ComparablesIndex:
+    """Sorted-block index over the resale table for nearest-neighbour comparables lookups."""
+
+    def __init__(self, data, version=None):
+        self.version = version
+        self.n_rows = len(data)
+
+        features = comparable_features(data)
+        valid = (features['floor_area_sqm'] > 0) & (data['resale_price'].to_numpy() > 0)
+        self.scales = {name: float(np.nanstd(values[valid]) or 1.0) for name, values in features.items()}
+
+        # Order rows by (town, flat_type) block, then floor area within each block
+        town_codes, self.towns = pd.factorize(data['town'].astype(str))
+        flat_type_codes, self.flat_types = pd.factorize(data['flat_type'].astype(str))
+        block_ids = town_codes.astype(np.int64) * len(self.flat_types) + flat_type_codes
+        order = np.lexsort((features['floor_area_sqm'], block_ids))
+        order = order[valid[order]]
+        self.rows = order.astype(np.int32)
+
+        sorted_blocks = block_ids[order]
+        n_blocks = len(self.towns) * len(self.flat_types)
+        self.block_offsets = np.searchsorted(sorted_blocks, np.arange(n_blocks + 1))
+
+        self.features = {name: values[order] for name, values in features.items()}
+        self.month_ordinal = month_ordinals(data['month'])[order]
+        self.flat_model = data['flat_model'].astype(str).to_numpy()[order]
+        self.latest_month = int(self.month_ordinal.max()) if len(order) else 0
+
+    # Function to get the [start, end) slice of the sorted rows for a town and flat type
+    def _block(self, town, flat_type):
+        town_codes = np.flatnonzero(self.towns == town)
+        flat_type_codes = np.flatnonzero(self.flat_types == flat_type)
+        if len(town_codes) == 0 or len(flat_type_codes) == 0:
+            return 0, 0
+        block_id = town_codes[0] * len(self.flat_types) + flat_type_codes[0]
+        return self.block_offsets[block_id], self.block_offsets[block_id + 1]
+
+    # Function to return the row positions and distances of the top-k comparables
+    def query(self, towns, flat_type, floor_area_sqm, storey_range, remaining_lease, flat_model=None,
+              k=DEFAULT_K, months_back=DEFAULT_MONTHS_BACK, area_tolerance=DEFAULT_AREA_TOLERANCE):
+        query = {
+            'floor_area_sqm': float(floor_area_sqm),
+            'storey': float(storey_midpoints(pd.Series([storey_range]))[0]),
+            'remaining_lease': float(remaining_lease),
+        }
+        low = query['floor_area_sqm'] * (1 - area_tolerance)
+        high = query['floor_area_sqm'] * (1 + area_tolerance)
+        min_month = self.latest_month - months_back
+
+        # Binary search the floor-area window inside each requested block
+        candidates = []
+        for town in dict.fromkeys(towns):
+            start, end = self._block(town, flat_type)
+            areas = self.features['floor_area_sqm'][start:end]
+            candidates.append(np.arange(
+                start + np.searchsorted(areas, low, side='left'),
+                start + np.searchsorted(areas, high, side='right'),
+            ))
+        candidates = np.concatenate(candidates) if candidates else np.empty(0, dtype=np.int64)
+        candidates = candidates[self.month_ordinal[candidates] >= min_month]
+        if len(candidates) == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        distances = comparable_distances(
+            {name: values[candidates] for name, values in self.features.items()},
+            self.scales, query, self.flat_model[candidates], flat_model,
+        )
+        # Break distance ties in favour of the most recent transactions
+        top = np.lexsort((-self.month_ordinal[candidates], distances))[:k]
+        return self.rows[candidates[top]], distances[top]
+
+
+# Function to find the top-k comparables by scanning the whole table, used as a baseline
+def brute_force_comparables(data, scales, towns, flat_type, floor_area_sqm, storey_range, remaining_lease,
+                            flat_model=None, k=DEFAULT_K, months_back=DEFAULT_MONTHS_BACK,
+                            area_tolerance=DEFAULT_AREA_TOLERANCE):
+    features = comparable_features(data)
+    ordinals = month_ordinals(data['month'])
+    area = float(floor_area_sqm)
+    mask = (
+        data['town'].isin(towns).to_numpy()
+        & (data['flat_type'] == flat_type).to_numpy()
+        & (features['floor_area_sqm'] >= area * (1 - area_tolerance))
+        & (features['floor_area_sqm'] <= area * (1 + area_tolerance))
+        & (ordinals >= ordinals.max() - months_back)
+        & (data['resale_price'].to_numpy() > 0)
+    )
+    candidates = np.flatnonzero(mask)
+    query = {
+        'floor_area_sqm': area,
+        'storey': float(storey_midpoints(pd.Series([storey_range]))[0]),
+        'remaining_lease': float(remaining_lease),
+    }
+    distances = comparable_distances(
+        {name: values[candidates] for name, values in features.items()},
+        scales, query, data['flat_model'].astype(str).to_numpy()[candidates], flat_model,
+    )
+    top = np.lexsort((-ordinals[candidates], distances))[:k]
+    return candidates[top], distances[top]
@@ -0,0 +1,113 @@
+# filename: data_export.py
+import os
+import time
+import tempfile
+import pyarrow as pa
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
+from utility import env_int
+
+# """
+# This file contains the export of filtered explorer results to CSV or Parquet.
+# Rows are written to a file in fixed-size chunks, so an export never builds a full
+# copy of the selection or a full CSV string in memory, only one chunk at a time.
+# Export files are removed once they are older than a time to live, so sessions that
+# end without downloading do not leave them behind.
+# """
+
+# Number of rows converted and written per chunk
+EXPORT_CHUNK_ROWS = 50_000
+
+# Prefix of export file names, so stale exports can be told apart from other files
+EXPORT_FILE_PREFIX = 'hdb_export_'
+
+# Seconds an export file is kept before it is removed
+EXPORT_TTL_SECONDS = env_int("HDB_EXPORT_TTL_SECONDS", 60 * 60)
+
+# File extension and MIME type of each export format
+EXPORT_FORMATS = {
+    'CSV': ('.csv', 'text/csv'),
+    'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+
+
+# Function to yield consecutive row chunks of a DataFrame
+def iter_chunks(data, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, len(data), chunk_rows):
+        yield data.iloc[start:start + chunk_rows]
+
+
+# Function to get the Arrow schema shared by every chunk of a DataFrame
+def export_schema(data):
+    # The schema comes from the DataFrame's dtypes, so the compact session data keeps its
+    # dictionary-encoded strings and narrowed numbers in Parquet
+    return pa.Schema.from_pandas(data.iloc[:0], preserve_index=False)
+
+
+# Function to convert the row chunks of a DataFrame to Arrow tables with one schema
+def iter_tables(data, schema, chunk_rows=EXPORT_CHUNK_ROWS):
+    for chunk in iter_chunks(data, chunk_rows):
+        yield pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+# Function to write a DataFrame to a CSV file chunk by chunk
+def write_csv(data, path, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Arrow's CSV writer formats several times faster than DataFrame.to_csv
+    schema = export_schema(data)
+    with pcsv.CSVWriter(path, schema) as writer:
+        for table in iter_tables(data, schema, chunk_rows):
+            writer.write_table(table)
+
+
+# Function to write a DataFrame to a Parquet file chunk by chunk, one row group per chunk
+def write_parquet(data, path, chunk_rows=EXPORT_CHUNK_ROWS):
+    schema = export_schema(data)
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for table in iter_tables(data, schema, chunk_rows):
+            writer.write_table(table)
+
+
+# Function to export a DataFrame to a temporary file, returning its path and the export statistics
+def export_to_tempfile(data, export_format, chunk_rows=EXPORT_CHUNK_ROWS, directory=None):
+    extension, _ = EXPORT_FORMATS[export_format]
+    handle, path = tempfile.mkstemp(prefix=EXPORT_FILE_PREFIX, suffix=extension, dir=directory)
+    os.close(handle)
+
+    start = time.perf_counter()
+    try:
+        if export_format == 'Parquet':
+            write_parquet(data, path, chunk_rows)
+        else:
+            write_csv(data, path, chunk_rows)
+    except Exception:
+        os.remove(path)
+        raise
+    seconds = time.perf_counter() - start
+
+    stats = {
+        'rows': len(data),
+        'bytes': os.path.getsize(path),
+        'seconds': seconds,
+        'rows_per_second': len(data) / seconds if seconds > 0 else float('inf'),
+    }
+    return path, stats
+
+
+# Function to remove the export files in a directory that are older than the time to live,
+# returning the number removed
+def remove_stale_exports(directory, ttl_seconds=EXPORT_TTL_SECONDS):
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - ttl_seconds
+    removed = 0
+    for entry in os.scandir(directory):
+        if not entry.name.startswith(EXPORT_FILE_PREFIX):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            # Another session or process removed it first
+            continue
+    return removed
@@ -0,0 +1,171 @@
+# filename: intent_router.py
+import re
+from collections import namedtuple
+
+# """
+# This file contains the local first stage of the HDB Assistant. Before any upstream call, a
+# question is routed by keyword matching to one of four intents:
+#   - off-topic: the question is clearly about something else (e.g. recipes, sports) and nothing
+#     in it relates to housing, or it is only a greeting, so it is rejected straight away,
+#   - FAQ: a known question about eligibility or income ceilings, answered from a local table,
+#   - general: an HDB question that GPT can answer on its own,
+#   - research: an HDB question about current or changing information, which also runs the crew's
+#     web research on the HDB website.
+# The assistant page already sets the HDB context, so a question without a clear off-topic
+# signal is treated as an HDB question even if it uses none of the housing words below.
+# """
+
+OFF_TOPIC = 'off-topic'
+FAQ = 'faq'
+GENERAL = 'general'
+RESEARCH = 'research'
+
+# The intent of a question, with the local answer for off-topic and FAQ questions
+Route = namedtuple('Route', ['intent', 'answer'])
+
+OFF_TOPIC_ANSWER = (
+    "Sorry, I can only help with questions about Singapore HDB flats, such as eligibility, "
+    "income ceilings, grants, BTO launches and resale transactions."
+)
+
+FAQ_FOOTNOTE = "\n\nThese are general figures and may have changed; please confirm the latest rules on hdb.gov.sg."
+
+# Words showing that a question is about housing in Singapore
+HOUSING_TERMS = {
+    'hdb', 'bto', 'sbf', 'ec', 'ecs', 'flat', 'flats', 'resale', 'housing', 'house', 'home', 'homes',
+    'apartment', 'property', 'properties', 'condominium', 'condo', 'lease', 'leasehold', 'rent', 'rental',
+    'tenant', 'landlord', 'mop', 'cpf', 'grant', 'grants', 'ballot', 'balloting', 'queue', 'room', 'executive',
+    'maisonette', 'jumbo', 'storey', 'sqm', 'town', 'estate', 'mortgage', 'loan', 'downpayment', 'valuation',
+    'cov', 'renovation', 'upgrading', 'eligibility', 'eligible', 'fiance', 'fiancee', 'bachelor', 'singles',
+    'household', 'income', 'ceiling', 'buyer', 'buyers', 'seller', 'sellers', 'sell', 'buy', 'purchase', 'plh',
+    'launch', 'launches', 'stamp', 'duty', 'bsd', 'absd', 'ura', 'singapore', 'tengah', 'punggol', 'sengkang',
+    'tampines', 'woodlands', 'yishun', 'bedok', 'jurong', 'hougang', 'bishan', 'queenstown', 'toa', 'payoh',
+    'occupation', 'ethnic', 'eip', 'spr', 'pr', 'prs', 'citizen', 'citizens', 'resident', 'residents', 'hfe',
+    'flexi', 'ssc', 'sers', 'buyback', 'block', 'blk', 'unit', 'pet', 'key', 'keys', 'neighbour', 'neighbor',
+    'postal', 'precinct', 'void', 'deck', 'lift', 'corridor', 'town council',
+}
+
+# Words showing that a question is about something other than housing; a question is only
+# rejected as off-topic if it has one of these and no housing word. Words that also come up in
+# housing questions (pets, postal codes, greetings before a question) are left out on purpose.
+OFF_TOPIC_TERMS = {
+    'poem', 'poems', 'story', 'joke', 'jokes', 'song', 'songs', 'lyrics', 'movie', 'movies', 'film',
+    'recipe', 'recipes', 'cook', 'cooking', 'restaurant', 'weather', 'football', 'soccer', 'basketball',
+    'sports', 'game', 'games', 'laptop', 'computer', 'password', 'phone', 'python', 'coding', 'bitcoin',
+    'crypto', 'stock', 'stocks', 'capital', 'france', 'translate',
+}
+
+# Greetings, ignored when the question has other words and rejected when it has nothing else
+GREETING_TERMS = {
+    'hello', 'hi', 'hey', 'hiya', 'there', 'good', 'morning', 'afternoon', 'evening', 'greetings',
+}
+
+# Words and phrases showing that a question needs current information from the HDB website
+RESEARCH_TERMS = {
+    'latest', 'current', 'currently', 'today', 'new', 'upcoming', 'recent', 'recently', 'launch',
+    'launches', 'launched', 'exercise', 'news', 'update', 'updated', 'change', 'changes', 'changed',
+    'announced', 'announcement', 'schedule', 'revised', 'this year', 'next year',
+}
+YEAR_PATTERN = re.compile(r'\b20\d\d\b')
+
+# Words in the income and eligibility groups below that mean the question is about grants or loans,
+# whose conditions differ from buying a BTO flat
+GRANT_TERMS = {'grant', 'grants', 'loan', 'loans', 'ehg', 'subsidy'}
+INCOME_TERMS = {'income', 'salary', 'earn', 'earning', 'earnings'}
+APPLY_TERMS = {'apply', 'applicant', 'applicants', 'buy', 'eligible', 'eligibility', 'minimum', 'qualify', 'must'}
+# Schemes with their own age and eligibility rules, which the general answers below do not cover
+SCHEME_TERMS = {'flexi', 'senior', 'seniors', 'elderly', 'retiree', 'retirees', 'sers', 'buyback'}
+
+# Local answers, checked in order so more specific entries come first. An entry matches when
+# the question contains at least one word from every group in `all_of` and none in `none_of`.
+FAQ_ENTRIES = [
+    {
+        'all_of': [{'ec', 'ecs', 'executive condominium'}, INCOME_TERMS | {'ceiling'}],
+        'none_of': GRANT_TERMS,
+        'answer': (
+            "Answer: The household income ceiling for an Executive Condominium (EC) is $16,000 a month "
+            "(average gross monthly household income)."
+        ),
+    },
+    {
+        'all_of': [{'single', 'bachelor', 'unmarried', 'alone'}, APPLY_TERMS | {'age', 'old'}],
+        'none_of': GRANT_TERMS | SCHEME_TERMS,
+        'answer': (
+            "Answer: Singles can buy a flat under the Single Singapore Citizen Scheme from age 35. "
+            "At least one applicant must be a Singapore Citizen, and the other usual conditions on income "
+            "and property ownership apply."
+        ),
+    },
+    {
+        'all_of': [INCOME_TERMS | {'ceiling'}, {'ceiling', 'limit', 'cap', 'maximum', 'max', 'much', 'exceed'}],
+        'none_of': GRANT_TERMS,
+        'answer': (
+            "Answer: To buy a BTO flat, the average gross monthly household income must not exceed $14,000. "
+            "For Executive Condominiums the ceiling is $16,000."
+        ),
+    },
+    {
+        # Only questions about the minimum age; e.g. "can I apply at age 55" asks something else
+        'all_of': [
+            {'how old', 'minimum age', 'age limit', 'age requirement', 'age requirements'},
+            APPLY_TERMS | {'age'},
+        ],
+        'none_of': GRANT_TERMS | SCHEME_TERMS,
+        'answer': (
+            "Answer: Applicants for a BTO flat must be at least 21 years old. Singles applying on their own "
+            "must be at least 35 years old."
+        ),
+    },
+    {
+        'all_of': [{'eligible', 'eligibility', 'qualify', 'criteria', 'requirement', 'condition'}, {'bto', 'flat', 'hdb'}],
+        'none_of': GRANT_TERMS | SCHEME_TERMS | {'resale', 'ec', 'executive condominium'},
+        'answer': (
+            "Answer: To be eligible for a BTO flat:\n"
+            "- At least one applicant must be a Singapore Citizen, with the others Singapore Citizens or "
+            "Permanent Residents.\n"
+            "- Applicants must be at least 21 years old (35 for singles).\n"
+            "- The family nucleus must qualify under a scheme such as the Public, Fiancé/Fiancée or Orphan Scheme.\n"
+            "- The average gross monthly household income must not exceed $14,000.\n"
+            "- Applicants must not own other property locally or overseas, or have disposed of private "
+            "property within the last 30 months.\n\n"
+            "You can check your own case with the BTO Eligibility Checker."
+        ),
+    },
+]
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+# Function to split a question into lowercase words, adding singular forms of plurals
+def question_terms(question):
+    words = WORD_PATTERN.findall(question.lower().replace("’", "'"))
+    terms = set(words)
+    terms.update(word[:-1] for word in words if len(word) > 3 and word.endswith('s'))
+    # Two-word phrases, so entries can match e.g. 'executive condominium'
+    terms.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    return terms
+
+
+# Function to find the local answer to a question, or None if no FAQ entry matches
+def match_faq(terms):
+    for entry in FAQ_ENTRIES:
+        if all(terms & group for group in entry['all_of']) and not terms & entry.get('none_of', set()):
+            return entry['answer'] + FAQ_FOOTNOTE
+    return None
+
+
+# Function to route a question to an intent before any upstream call
+def route_question(question):
+    terms = question_terms(question)
+    words = {term for term in terms if ' ' not in term}
+    if words and words <= GREETING_TERMS:
+        return Route(OFF_TOPIC, OFF_TOPIC_ANSWER)
+    if terms & OFF_TOPIC_TERMS and not terms & HOUSING_TERMS:
+        return Route(OFF_TOPIC, OFF_TOPIC_ANSWER)
+    # Questions about what is current or changing go to web research, even if an FAQ matches
+    if terms & RESEARCH_TERMS or YEAR_PATTERN.search(question):
+        return Route(RESEARCH, None)
+    answer = match_faq(terms)
+    if answer is not None:
+        return Route(FAQ, answer)
+    return Route(GENERAL, None)
@@ -0,0 +1,164 @@
+# filename: price_model.py
+import time
+import numpy as np
+import pandas as pd
+from analytics import month_ordinals
+
+# """
+# This file contains the resale price estimation model used by the Resale Transactions Explorer.
+# It is a ridge regression of log(resale_price) on one-hot encoded town, flat type, storey range,
+# flat model and month, plus floor area and remaining lease. Training builds the normal equations
+# straight from category codes with bincount, so no design matrix is ever materialized, and
+# scoring a batch is one coefficient lookup per categorical column plus a small matrix product.
+# """
+
+# Categorical inputs, one-hot encoded; 'month' is encoded as a month ordinal
+CATEGORICAL_FEATURES = ['town', 'flat_type', 'storey_range', 'flat_model', 'month']
+
+# Numeric inputs expected by PriceModel.predict
+NUMERIC_INPUTS = ['floor_area_sqm', 'remaining_lease']
+
+# Ridge penalty on every coefficient except the intercept
+DEFAULT_ALPHA = 1.0
+
+
+# Function to compute the numeric features from floor areas and remaining leases in years
+def numeric_features(floor_area_sqm, remaining_lease):
+    floor_area_sqm = np.asarray(floor_area_sqm, dtype=np.float64)
+    remaining_lease = np.asarray(remaining_lease, dtype=np.float64)
+    # Prices scale with floor area, and fall faster as the lease runs down
+    return np.column_stack([np.log(floor_area_sqm), remaining_lease, remaining_lease ** 2])
+
+
+# Function to get the rows of the cleaned resale table that the model can learn from
+def training_rows(data):
+    months = month_ordinals(data['month'])
+    # Unknown months, prices and floor areas are filled with placeholders during ingest
+    keep = (
+        (months >= 0)
+        & (data['resale_price'].to_numpy(dtype=float) > 0)
+        & (data['floor_area_sqm'].to_numpy(dtype=float) > 0)
+    )
+    return np.flatnonzero(keep), months
+
+
+class PriceModel:
+    """Ridge regression of log resale price trained from the cleaned resale table."""
+
+    def __init__(self, version, levels, coefficients, intercept, numeric_mean, numeric_std, stats):
+        self.version = version
+        # Category values per categorical feature; month levels are month ordinals
+        self.levels = levels
+        # One coefficient array per categorical feature, then one per numeric feature
+        self.coefficients = coefficients
+        self.intercept = intercept
+        self.numeric_mean = numeric_mean
+        self.numeric_std = numeric_std
+        self.stats = stats
+
+    @classmethod
+    def train(cls, data, version, alpha=DEFAULT_ALPHA):
+        start = time.perf_counter()
+        rows, all_months = training_rows(data)
+        target = np.log(data['resale_price'].to_numpy(dtype=np.float64)[rows])
+
+        # Integer codes per categorical feature; every level seen in training gets a coefficient
+        levels, codes = {}, []
+        for feature in CATEGORICAL_FEATURES:
+            if feature == 'month':
+                months = all_months[rows]
+                feature_levels = np.arange(months.min(), months.max() + 1)
+                feature_codes = months - months.min()
+            else:
+                feature_codes, feature_levels = pd.factorize(data[feature].to_numpy()[rows], sort=True)
+                feature_levels = list(feature_levels)
+            levels[feature] = feature_levels
+            codes.append(feature_codes.astype(np.int64))
+        sizes = [len(levels[feature]) for feature in CATEGORICAL_FEATURES]
+
+        # Numeric features are standardized, with a leading column of ones for the intercept
+        lease = data['remaining_lease_months'].to_numpy(dtype=np.float64)[rows] / 12
+        numeric = numeric_features(data['floor_area_sqm'].to_numpy()[rows], lease)
+        numeric_mean, numeric_std = numeric.mean(axis=0), numeric.std(axis=0)
+        numeric_std[numeric_std == 0] = 1.0
+        numeric = np.column_stack([np.ones(len(rows)), (numeric - numeric_mean) / numeric_std])
+
+        # Normal equations X'X and X'y, block by block, without building the one-hot matrix
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+        n_categorical = offsets[-1]
+        n_features = n_categorical + numeric.shape[1]
+        gram = np.zeros((n_features, n_features))
+        moment = np.zeros(n_features)
+        for i, (codes_i, size_i) in enumerate(zip(codes, sizes)):
+            block_i = slice(offsets[i], offsets[i + 1])
+            gram[block_i, block_i] = np.diag(np.bincount(codes_i, minlength=size_i))
+            for j in range(i + 1, len(codes)):
+                block_j = slice(offsets[j], offsets[j + 1])
+                # Co-occurrence counts of the two features' levels
+                pairs = np.bincount(codes_i * sizes[j] + codes[j], minlength=size_i * sizes[j])
+                gram[block_i, block_j] = pairs.reshape(size_i, sizes[j])
+                gram[block_j, block_i] = gram[block_i, block_j].T
+            for k in range(numeric.shape[1]):
+                gram[block_i, n_categorical + k] = np.bincount(codes_i, weights=numeric[:, k], minlength=size_i)
+                gram[n_categorical + k, block_i] = gram[block_i, n_categorical + k]
+            moment[block_i] = np.bincount(codes_i, weights=target, minlength=size_i)
+        gram[n_categorical:, n_categorical:] = numeric.T @ numeric
+        moment[n_categorical:] = numeric.T @ target
+
+        # The intercept is not penalized; the one-hot blocks are identified by the penalty
+        penalty = np.full(n_features, alpha)
+        penalty[n_categorical] = 0.0
+        solution = np.linalg.solve(gram + np.diag(penalty), moment)
+
+        coefficients = [solution[offsets[i]:offsets[i + 1]] for i in range(len(sizes))]
+        coefficients.append(solution[n_categorical + 1:])
+        model = cls(version, levels, coefficients, solution[n_categorical], numeric_mean, numeric_std, {})
+
+        # In-sample fit on the log scale, reported alongside the model
+        fitted = model._predict_log(codes, numeric[:, 1:])
+        model.stats = {
+            'n_rows': len(rows),
+            'n_features': n_features,
+            'train_seconds': time.perf_counter() - start,
+            'median_abs_pct_error': float(np.median(np.abs(np.expm1(fitted - target)))) * 100,
+        }
+        return model
+
+    # Function to encode listings' categorical values to the training codes, -1 for unseen values
+    def encode(self, listings):
+        codes = []
+        for feature in CATEGORICAL_FEATURES:
+            feature_levels = self.levels[feature]
+            if feature == 'month':
+                if 'month' in listings.columns:
+                    months = month_ordinals(listings['month'])
+                    # Missing months are estimated at the latest month; months outside the
+                    # training range are clamped to its ends
+                    months = np.where(months < 0, feature_levels[-1], months)
+                else:
+                    months = np.full(len(listings), feature_levels[-1])
+                feature_codes = np.clip(months, feature_levels[0], feature_levels[-1]) - feature_levels[0]
+            else:
+                # Normalise each distinct value once and map it to its training code
+                value_codes, values = pd.factorize(listings[feature])
+                normalised = pd.Index(values).astype(str).str.strip().str.upper()
+                level_codes = np.append(pd.Index(feature_levels).get_indexer(normalised), -1)
+                # Missing values have code -1, which picks the appended -1
+                feature_codes = level_codes[value_codes]
+            codes.append(np.asarray(feature_codes, dtype=np.int64))
+        return codes
+
+    # Function to estimate the resale prices of a batch of listings
+    def predict(self, listings):
+        codes = self.encode(listings)
+        numeric = numeric_features(listings['floor_area_sqm'], listings['remaining_lease'])
+        numeric = (numeric - self.numeric_mean) / self.numeric_std
+        return np.exp(self._predict_log(codes, numeric))
+
+    def _predict_log(self, codes, numeric):
+        prediction = np.full(len(numeric), self.intercept)
+        for feature_codes, coefficients in zip(codes, self.coefficients):
+            # Values not seen in training contribute nothing, i.e. an average level
+            prediction += np.where(feature_codes >= 0, coefficients[np.maximum(feature_codes, 0)], 0.0)
+        prediction += numeric @ self.coefficients[-1]
+        return prediction
@@ -0,0 +1,88 @@
+# filename: row_hashing.py
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# """
+# This file contains the per-row content hashing used during ingest.
+# Each transaction is hashed to 64 bits over its key columns, which is used to drop
+# transactions repeated across overlapping child datasets and to diff two snapshots.
+# """
+
+# Columns identifying a transaction; remaining_lease is left out because its format
+# differs between child datasets and it is derived from the other columns anyway
+KEY_COLUMNS = [
+    'month', 'town', 'flat_type', 'block', 'street_name', 'storey_range',
+    'floor_area_sqm', 'flat_model', 'lease_commence_date', 'resale_price',
+]
+
+# 64-bit FNV prime used to combine column hashes
+HASH_PRIME = np.uint64(0x100000001B3)
+
+# Odd 64-bit constant used to mix the occurrence number into a row hash
+OCCURRENCE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+# Row positions added in the new snapshot and removed from the old one
+SnapshotDiff = namedtuple('SnapshotDiff', ['added_rows', 'removed_rows'])
+
+
+# Function to hash the distinct values of a column once and map the hashes back to the rows
+def _column_hashes(series):
+    if pd.api.types.is_numeric_dtype(series):
+        # 95 and 95.0 must hash alike, whatever dtype the column was narrowed to
+        return pd.util.hash_array(series.to_numpy(dtype='float64'))
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    normalised = pd.Index(uniques).astype(str).str.strip().str.upper()
+    return pd.util.hash_array(normalised.to_numpy(dtype=object))[codes]
+
+
+# Function to hash the normalised key columns of every row to a uint64
+def row_hashes(data):
+    hashes = np.zeros(len(data), dtype=np.uint64)
+    for column in KEY_COLUMNS:
+        # FNV-style mixing, so the column order matters and equal values in different columns differ
+        hashes = (hashes ^ _column_hashes(data[column])) * HASH_PRIME
+    return hashes
+
+
+# Function to number repeated hashes within each group: 0 for the first copy, 1 for the next, ...
+def occurrence_numbers(hashes, groups=None):
+    groups = np.zeros(len(hashes), dtype=np.int8) if groups is None else np.asarray(groups)
+    # lexsort is stable, so copies keep their original order inside each run
+    order = np.lexsort((hashes, groups))
+    sorted_hashes, sorted_groups = hashes[order], groups[order]
+    positions = np.arange(len(order))
+    run_starts = np.ones(len(order), dtype=bool)
+    run_starts[1:] = (sorted_hashes[1:] != sorted_hashes[:-1]) | (sorted_groups[1:] != sorted_groups[:-1])
+    first_in_run = np.maximum.accumulate(np.where(run_starts, positions, 0))
+    occurrences = np.empty(len(order), dtype=np.int64)
+    occurrences[order] = positions - first_in_run
+    return occurrences
+
+
+# Function to flag the rows to keep when child datasets overlap
+def cross_source_keep_mask(hashes, sources):
+    # Identical transactions inside one child dataset are kept, since genuinely identical
+    # sales happen; the n-th copy of a row is dropped only if another dataset already has it
+    keys = _mix_occurrences(hashes, occurrence_numbers(hashes, sources))
+    return ~pd.Series(keys).duplicated().to_numpy()
+
+
+# Function to mix occurrence numbers into row hashes
+def _mix_occurrences(hashes, occurrences):
+    return hashes ^ (occurrences.astype(np.uint64) * OCCURRENCE_MULTIPLIER)
+
+
+# Function to compute one key per row that stays unique when rows are repeated
+def snapshot_keys(hashes):
+    return _mix_occurrences(hashes, occurrence_numbers(hashes))
+
+
+# Function to diff two snapshots by their row keys
+def diff_snapshots(old_keys, new_keys):
+    added_rows = np.flatnonzero(~np.isin(new_keys, old_keys))
+    removed_rows = np.flatnonzero(~np.isin(old_keys, new_keys))
+    return SnapshotDiff(added_rows, removed_rows)
@@ -0,0 +1,137 @@
+# filename: search_index.py
+import numpy as np
+
+# """
+# This file contains the block / street search index used by the Resale Transactions Explorer.
+# The index maps blocks and street name tokens, separately, to distinct (block, street_name)
+# pairs and each pair to its row positions, so a query touches a few thousand pairs instead of
+# every transaction. A leading number in a query is matched against blocks only, and only the
+# last token, which may still be being typed, is matched as a prefix.
+# """
+
+# Full words users type, mapped to the abbreviations used in the street_name column
+STREET_ABBREVIATIONS = {
+    'AVENUE': 'AVE', 'STREET': 'ST', 'ROAD': 'RD', 'DRIVE': 'DR', 'CRESCENT': 'CRES',
+    'CENTRAL': 'CTRL', 'NORTH': 'NTH', 'SOUTH': 'STH', 'LORONG': 'LOR', 'UPPER': 'UPP',
+    'JALAN': 'JLN', 'BUKIT': 'BT', 'TANJONG': 'TG', 'KAMPONG': 'KG', 'PLACE': 'PL',
+    'CLOSE': 'CL', 'TERRACE': 'TER', 'GARDENS': 'GDNS', 'HEIGHTS': 'HTS', 'PARK': 'PK',
+}
+
+# Query words that carry no information, e.g. "BLK 123"
+IGNORED_QUERY_TOKENS = {'BLK', 'BLOCK'}
+
+
+# Function to split a block / street string into normalised search tokens
+def tokenize(text):
+    tokens = []
+    for token in str(text).upper().replace(',', ' ').split():
+        if token in IGNORED_QUERY_TOKENS:
+            continue
+        tokens.append(STREET_ABBREVIATIONS.get(token, token))
+    return tokens
+
+
+# Function to build sorted postings from a mapping of token to pair ids
+def build_postings(token_to_pairs):
+    tokens = np.array(sorted(token_to_pairs), dtype=str)
+    pair_lists = [np.asarray(token_to_pairs[token], dtype=np.int32) for token in tokens]
+    offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum([len(p) for p in pair_lists], out=offsets[1:])
+    pairs = np.concatenate(pair_lists) if pair_lists else np.empty(0, dtype=np.int32)
+    return tokens, offsets, pairs
+
+
+# Function to check whether a query token is a block number, e.g. "123" or "123A"
+def is_block_number(token):
+    return token[:1].isdigit()
+
+
+class AddressSearchIndex:
+    """Prefix index over the block and street_name columns of the resale table."""
+
+    # Bumped when the layout changes, so indexes persisted by older versions are rebuilt
+    FORMAT_VERSION = 2
+
+    def __init__(self, block_postings, street_postings, pair_offsets, pair_rows, n_rows, version=None):
+        # Blocks and street tokens are indexed separately, each as (sorted unique tokens,
+        # offsets, pair ids): token i -> pairs[offsets[i]:offsets[i + 1]]
+        self.blocks, self.block_offsets, self.block_pairs = block_postings
+        self.tokens, self.token_offsets, self.token_pairs = street_postings
+        self.pair_offsets = pair_offsets    # pair j -> pair_rows[offsets[j]:offsets[j + 1]]
+        self.pair_rows = pair_rows          # row positions, grouped by pair
+        self.n_rows = n_rows
+        self.version = version
+        self.format_version = self.FORMAT_VERSION
+
+    @classmethod
+    def build(cls, data, version=None):
+        # One id per distinct (block, street_name) pair
+        pairs = data.groupby(['block', 'street_name'], observed=True, sort=False).ngroup().to_numpy()
+        n_pairs = int(pairs.max()) + 1 if len(pairs) else 0
+
+        # Row positions grouped by pair id
+        pair_rows = np.argsort(pairs, kind='stable').astype(np.int32)
+        pair_offsets = np.zeros(n_pairs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs, minlength=n_pairs), out=pair_offsets[1:])
+
+        # Tokenise each distinct pair once, not each row
+        first_rows = pair_rows[pair_offsets[:-1]]
+        blocks = data['block'].to_numpy()[first_rows]
+        streets = data['street_name'].to_numpy()[first_rows]
+        block_to_pairs, token_to_pairs = {}, {}
+        for pair_id, (block, street) in enumerate(zip(blocks, streets)):
+            block_to_pairs.setdefault(str(block).strip().upper(), []).append(pair_id)
+            for token in set(tokenize(street)):
+                token_to_pairs.setdefault(token, []).append(pair_id)
+
+        return cls(
+            build_postings(block_to_pairs), build_postings(token_to_pairs),
+            pair_offsets, pair_rows, len(data), version
+        )
+
+    # Function to find the pair ids of a token, or of every token starting with it if prefix is set
+    @staticmethod
+    def _pairs_for_token(tokens, offsets, token_pairs, token, prefix):
+        start = np.searchsorted(tokens, token, side='left')
+        end = np.searchsorted(tokens, token + '\uffff' if prefix else token, side='right')
+        if start == end:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(token_pairs[offsets[start]:offsets[end]])
+
+    # Function to find the pair ids of a block number, preferring an exact match to a prefix match
+    def _pairs_for_block(self, token):
+        pairs = self._pairs_for_token(self.blocks, self.block_offsets, self.block_pairs, token, prefix=False)
+        if len(pairs) == 0:
+            # e.g. "123" finds blocks 123A and 123B when there is no block 123
+            pairs = self._pairs_for_token(self.blocks, self.block_offsets, self.block_pairs, token, prefix=True)
+        return pairs
+
+    # Function to return the sorted row positions matching every token of the query
+    def search(self, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return np.arange(self.n_rows, dtype=np.int32)
+
+        matched = None
+        for position, token in enumerate(tokens):
+            if position == 0 and is_block_number(token):
+                # A leading number is the block, as in "123 Bedok Nth Ave 1"
+                pairs = self._pairs_for_block(token)
+            else:
+                # Earlier tokens are complete words; only the last one may still be being typed
+                is_last = position == len(tokens) - 1
+                pairs = self._pairs_for_token(self.tokens, self.token_offsets, self.token_pairs, token, prefix=False)
+                if is_last and matched is not None and is_block_number(token):
+                    # A trailing street number matches exactly when it can, so "Ave 1" skips "Ave 10"
+                    exact = np.intersect1d(matched, pairs, assume_unique=True)
+                    if len(exact):
+                        matched = exact
+                        continue
+                if is_last:
+                    pairs = self._pairs_for_token(self.tokens, self.token_offsets, self.token_pairs, token, prefix=True)
+            matched = pairs if matched is None else np.intersect1d(matched, pairs, assume_unique=True)
+            if len(matched) == 0:
+                return np.empty(0, dtype=np.int32)
+
+        rows = [self.pair_rows[self.pair_offsets[p]:self.pair_offsets[p + 1]] for p in matched]
+        return np.sort(np.concatenate(rows))
@@ -0,0 +1,146 @@
+# filename: session_memory.py
+import os
+import sys
+import time
+import threading
+import pandas as pd
+from streamlit.logger import get_logger
+from utility import env_int
+
+# """
+# This file contains the per-session memory accounting shared by the explorer and the assistant.
+# The heavy objects of each browser session (filtered results, chat history) are kept in one
+# registry per server process instead of st.session_state, so that they can be measured together
+# and dropped for sessions that have gone idle or when the process exceeds its memory budget.
+# Sessions keep their filter selections in st.session_state and rebuild what was dropped.
+# The figures are logged for operators sizing deployments, not shown to users.
+# """
+
+_LOGGER = get_logger(__name__)
+
+
+# Function to estimate the memory held by an object in bytes
+def object_size(value):
+    if isinstance(value, pd.DataFrame):
+        size = value.index.nbytes
+        for _, column in value.items():
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                # Categories are shared with the full dataset, so only the per-row codes are counted
+                size += column.cat.codes.nbytes
+            else:
+                size += column.memory_usage(index=False, deep=True)
+        return int(size)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(object_size(k) + object_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(object_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class SessionMemory:
+    """Per-process registry of heavy session objects with idle and memory-budget eviction."""
+
+    def __init__(self, idle_seconds, budget_bytes, log_seconds=60):
+        self.idle_seconds = idle_seconds
+        self.budget_bytes = budget_bytes
+        # Minimum seconds between stats log lines; evictions are always logged
+        self.log_seconds = log_seconds
+        self.last_logged = None
+        self.lock = threading.Lock()
+        # session id -> {'last_seen': monotonic seconds, 'objects': {name: (value, size)}}
+        self.sessions = {}
+        self.evicted_sessions = 0
+        self.evicted_bytes = 0
+
+    # Function to store an object for a session, evicting other sessions if the budget is exceeded
+    def put(self, session_id, name, value):
+        size = object_size(value)
+        with self.lock:
+            session = self._touch(session_id)
+            session['objects'][name] = (value, size)
+        self.evict(keep=session_id)
+
+    # Function to get a session's object, or None if it was never stored or has been evicted
+    def get(self, session_id, name):
+        with self.lock:
+            session = self._touch(session_id)
+            value = session['objects'].get(name, (None, 0))[0]
+        self.evict(keep=session_id)
+        return value
+
+    # Function to drop one of a session's objects
+    def pop(self, session_id, name):
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session['objects'].pop(name, None)
+
+    # Function to drop the objects of idle sessions, then of the least recently seen
+    # sessions until the total is within the budget; the session `keep` is never evicted
+    def evict(self, keep=None):
+        now = time.monotonic()
+        evicted_before = self.evicted_sessions
+        with self.lock:
+            for session_id in list(self.sessions):
+                if session_id != keep and now - self.sessions[session_id]['last_seen'] > self.idle_seconds:
+                    self._evict(session_id)
+
+            total = sum(self._session_bytes(session) for session in self.sessions.values())
+            by_last_seen = sorted(self.sessions, key=lambda session_id: self.sessions[session_id]['last_seen'])
+            for session_id in by_last_seen:
+                if total <= self.budget_bytes:
+                    break
+                if session_id != keep:
+                    total -= self._evict(session_id)
+
+        log_due = self.last_logged is None or now - self.last_logged >= self.log_seconds
+        if log_due or self.evicted_sessions != evicted_before:
+            self.last_logged = now
+            self.log_stats()
+
+    # Function to log the memory held by all sessions in this process as key=value pairs
+    def log_stats(self):
+        stats = self.stats()
+        _LOGGER.info(
+            "session_memory pid=%d sessions=%d total_mb=%.1f max_session_mb=%.1f budget_mb=%.0f "
+            "evicted_sessions=%d evicted_mb=%.1f",
+            os.getpid(), stats['sessions'], stats['total_bytes'] / 1_000_000,
+            stats['max_session_bytes'] / 1_000_000, stats['budget_bytes'] / 1_000_000,
+            stats['evicted_sessions'], stats['evicted_bytes'] / 1_000_000,
+        )
+
+    # Function to report the memory held by all sessions in this process
+    def stats(self):
+        with self.lock:
+            session_bytes = [self._session_bytes(session) for session in self.sessions.values()]
+            return {
+                'sessions': len(session_bytes),
+                'total_bytes': sum(session_bytes),
+                'max_session_bytes': max(session_bytes, default=0),
+                'budget_bytes': self.budget_bytes,
+                'evicted_sessions': self.evicted_sessions,
+                'evicted_bytes': self.evicted_bytes,
+            }
+
+    def _touch(self, session_id):
+        session = self.sessions.setdefault(session_id, {'last_seen': 0.0, 'objects': {}})
+        session['last_seen'] = time.monotonic()
+        return session
+
+    def _session_bytes(self, session):
+        return sum(size for _, size in session['objects'].values())
+
+    def _evict(self, session_id):
+        freed = self._session_bytes(self.sessions.pop(session_id))
+        if freed:
+            self.evicted_sessions += 1
+            self.evicted_bytes += freed
+        return freed
+
+
+# One registry per server process, shared by every session it serves
+session_memory = SessionMemory(
+    idle_seconds=env_int("HDB_SESSION_IDLE_SECONDS", 30 * 60),
+    budget_bytes=env_int("HDB_SESSION_MEMORY_BUDGET_MB", 1024) * 1_000_000,
+    log_seconds=env_int("HDB_SESSION_MEMORY_LOG_SECONDS", 60),
+)
@@ -0,0 +1,144 @@
+# filename: shared_data.py
+import os
+import json
+import shutil
+import fcntl
+import numpy as np
+import pandas as pd
+
+# """
+# This file contains the shared-memory dataset used when several Streamlit server processes
+# run on one host. One process publishes the cleaned columns as .npy files under a versioned
+# directory (ideally on /dev/shm), and every process attaches read-only memory maps of them,
+# so the resale table is held in RAM once per host instead of once per process.
+#
+# Layout of the shared directory:
+#   CURRENT            version to attach
+#   publish.lock       serialises publishers
+#   v<version>/        manifest.json plus one .npy file per column (codes for categoricals)
+# """
+
+# Set this environment variable to a directory to enable shared memory mode, e.g. /dev/shm/hdb_explorer
+SHARED_DATA_DIR_ENV = "HDB_SHARED_DATA_DIR"
+
+CURRENT_FILE_NAME = "CURRENT"
+LOCK_FILE_NAME = "publish.lock"
+MANIFEST_FILE_NAME = "manifest.json"
+
+# Number of published versions kept on disk; older ones are removed after a new publish.
+# Processes still attached to a removed version keep working until they re-attach.
+KEEP_VERSIONS = 2
+
+
+# Function to get the shared data directory, or None when shared memory mode is disabled
+def get_shared_data_dir():
+    return os.environ.get(SHARED_DATA_DIR_ENV) or None
+
+
+# Function to read the version currently published in the shared directory
+def current_shared_version(base_dir):
+    try:
+        with open(os.path.join(base_dir, CURRENT_FILE_NAME), "r") as current_file:
+            return current_file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class publish_lock:
+    """Exclusive lock held while a process publishes a new version."""
+
+    def __init__(self, base_dir, lock_file_name=LOCK_FILE_NAME):
+        os.makedirs(base_dir, exist_ok=True)
+        self.path = os.path.join(base_dir, lock_file_name)
+
+    def __enter__(self):
+        self.file = open(self.path, "w")
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+# Function to get the smallest integer dtype pandas uses for categorical codes,
+# so attached codes can back a Categorical without being converted
+def _codes_dtype(n_categories):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+# Function to publish a DataFrame's columns as a new shared version and make it current
+def publish_shared_data(data, version, base_dir):
+    version = str(version)
+    version_dir = os.path.join(base_dir, f"v{version}")
+    staging_dir = f"{version_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+
+    columns = []
+    for position, column in enumerate(data.columns):
+        series = data[column]
+        file_name = f"{position}.npy"
+        if isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object:
+            categorical = series.astype('category') if series.dtype == object else series
+            categories = categorical.cat.categories
+            codes = categorical.cat.codes.to_numpy().astype(_codes_dtype(len(categories)))
+            np.save(os.path.join(staging_dir, file_name), codes)
+            columns.append({
+                "name": column, "kind": "category", "file": file_name,
+                "categories": [str(c) for c in categories],
+            })
+        else:
+            np.save(os.path.join(staging_dir, file_name), np.ascontiguousarray(series.to_numpy()))
+            columns.append({"name": column, "kind": "array", "file": file_name})
+
+    with open(os.path.join(staging_dir, MANIFEST_FILE_NAME), "w") as manifest_file:
+        json.dump({"version": version, "n_rows": len(data), "columns": columns}, manifest_file)
+
+    # Swap the new version in: readers only ever see complete directories
+    shutil.rmtree(version_dir, ignore_errors=True)
+    os.rename(staging_dir, version_dir)
+    current_tmp = os.path.join(base_dir, f"{CURRENT_FILE_NAME}.tmp-{os.getpid()}")
+    with open(current_tmp, "w") as current_file:
+        current_file.write(version)
+    os.replace(current_tmp, os.path.join(base_dir, CURRENT_FILE_NAME))
+
+    _remove_old_versions(base_dir)
+    return version
+
+
+# Function to remove published versions beyond the most recent KEEP_VERSIONS
+def _remove_old_versions(base_dir):
+    version_dirs = sorted(
+        (name for name in os.listdir(base_dir)
+         if name.startswith("v") and os.path.isdir(os.path.join(base_dir, name)) and ".tmp-" not in name),
+        key=lambda name: os.path.getmtime(os.path.join(base_dir, name)),
+    )
+    for name in version_dirs[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(base_dir, name), ignore_errors=True)
+
+
+# Function to attach read-only, zero-copy views of a published version
+def attach_shared_data(base_dir, version=None):
+    version = version if version is not None else current_shared_version(base_dir)
+    if version is None:
+        return None
+    version_dir = os.path.join(base_dir, f"v{version}")
+    with open(os.path.join(version_dir, MANIFEST_FILE_NAME), "r") as manifest_file:
+        manifest = json.load(manifest_file)
+
+    columns = {}
+    for column in manifest["columns"]:
+        values = np.load(os.path.join(version_dir, column["file"]), mmap_mode='r')
+        if column["kind"] == "category":
+            # from_codes keeps the mapped codes array as is when validation is skipped
+            values = pd.Categorical.from_codes(values, categories=column["categories"], validate=False)
+        columns[column["name"]] = values
+
+    # copy=False keeps one block per column instead of consolidating (and copying) them
+    data = pd.DataFrame(columns, copy=False)
+    data.attrs["shared_version"] = manifest["version"]
+    return data
@@ -65,12 +65,29 @@ def display():
             - **Bar Charts:** Users can view average resale prices by town and flat type using Altair bar charts, providing 
             a visual representation of market conditions.
             - **Line Chart:** The application also features a line chart illustrating how average resale prices change over 
-            the years.
+            the years, and a monthly median price trend that is aggregated and downsampled on the server before it 
+            is sent to the browser.
         
         - **Dynamic Filtering:** Users can select specific years, months, towns, flat types, storey ranges, and other 
         attributes to filter the dataset dynamically. Sliders allow for range selections on numeric values such as 
         floor area, remaining lease, lease commence date, and resale price.
         
+        - **Block and Street Search:** A search box matches a leading block number against blocks and the rest of the 
+        query against street names, completing the last word as it is typed. It uses an index that is built once per 
+        dataset and stored in the same ZIP file, so results return in milliseconds.
+
+        - **Export:** The filtered results can be downloaded as CSV or Parquet. Rows are written to a file in chunks 
+        and the server streams the file from disk, so even a full-history export does not build a copy of the data in 
+        memory. Export files are removed after an hour.
+
+        - **Price Map:** A map of Singapore shows the average resale price per sqm of each town for the applied year, 
+        town and flat type filters. Town locations come from a table shipped with the application, and prices are 
+        summarised once per dataset update, so the map stays quick for any selection.
+
+        - **Price Estimate:** A regression model trained on all transactions whenever the data is updated estimates a 
+        flat's resale price from its town, flat type, storey range, flat model, floor area and remaining lease. A CSV 
+        file of listings can be uploaded to estimate thousands of flats at once.
+
         - **User Interface Elements:** Interactive buttons and message placeholders guide users in updating data and provide 
         feedback (e.g., success messages) regarding actions taken. The application employs a responsive layout using 
         Streamlit columns to organize the filter options efficiently.
@@ -116,6 +133,7 @@ def display():
     with st.expander("Features", expanded=True):
         features = [
             "User Input Section: A text area for users to submit their questions related to HDB, with a placeholder for guidance.",
+            "Question Routing: A local first stage that turns away questions unrelated to HDB, answers common eligibility and income ceiling questions from a built-in table, and only runs the web research for questions about current or changing information.",
             "Question Breakdown: An agent (Question Planner) that breaks down the user’s query into sub-questions or key areas of focus, ensuring thoroughness in research.",
             "Research and Information Gathering: A second agent (Research Analyst) that conducts a web search using the WebsiteSearchTool to gather relevant information from the HDB website based on the breakdown provided by the Question Planner.",
             "Structured Response Generation: A third agent (Answer Writer) that synthesizes the gathered information into a clear, structured answer that addresses the user’s question comprehensively.",
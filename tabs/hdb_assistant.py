@@ -4,6 +4,10 @@ from openai import OpenAI
 from crewai import Agent, Task, Crew
 from crewai_tools import WebsiteSearchTool
 from dotenv import load_dotenv
+from assistant_gateway import BackendGateway
+from intent_router import route_question, OFF_TOPIC, FAQ, RESEARCH
+from session_memory import session_memory
+from utility import get_session_id, env_int
 
 load_dotenv() 
 
@@ -85,13 +89,52 @@ crew = Crew(
     verbose=True
 )
 
+# Per-process gateways in front of the GPT and crew backends. Identical in-flight requests
+# share one upstream call, and concurrency, rate and queue depth are capped per process.
+gpt_gateway = BackendGateway(
+    "GPT",
+    max_concurrency=env_int("HDB_GPT_MAX_CONCURRENCY", 8),
+    rate_per_minute=env_int("HDB_GPT_RATE_PER_MINUTE", 60),
+    max_queue=env_int("HDB_GPT_MAX_QUEUE", 32),
+)
+crew_gateway = BackendGateway(
+    "Crew Web Search",
+    max_concurrency=env_int("HDB_CREW_MAX_CONCURRENCY", 2),
+    rate_per_minute=env_int("HDB_CREW_RATE_PER_MINUTE", 10),
+    max_queue=env_int("HDB_CREW_MAX_QUEUE", 8),
+)
+
+# Number of most recent chat messages kept per session and sent to GPT as context
+MAX_HISTORY_MESSAGES = 20
+
+# Function to get a GPT answer. Only a session's first question, sent without history, is shared
+# with the same question already in flight; answers that depend on a chat history are not shared.
+def get_gpt_answer(messages):
+    def call_gpt():
+        response = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=messages
+        )
+        return response.choices[0].message.content
+    key = messages[0]['content'] if len(messages) == 1 else None
+    return gpt_gateway.call(key, call_gpt)
+
+# Function to execute the agent workflow and return the answer, shared with identical questions in flight
+def get_hdb_bto_answer(question):
+    def run_crew():
+        # Each run gets its own copy of the crew so concurrent runs do not share task state
+        result = crew.copy().kickoff(inputs={"question": question})
+        return result.raw
+    return crew_gateway.call(question, run_crew)
+
 def display():
     st.title("✨ HDB Assistant")
     st.write("Get assistance with your HDB questions from GPT 3.5 Turbo and information straight from HDB's website.")
 
-    # Initialize session state for messages if it doesn't exist
-    if 'messages' not in st.session_state:
-        st.session_state.messages = []
+    # The chat history is kept in this session's share of the memory budget; it starts
+    # over if it was evicted while the session was idle
+    session_id = get_session_id()
+    messages = session_memory.get(session_id, 'messages') or []
 
     # Display the chat messages
     def display_messages(input):
@@ -104,6 +147,14 @@ def display():
                     unsafe_allow_html=True,
                 )
 
+    # Report how busy the backends are in this server process
+    gpt_stats = gpt_gateway.stats()
+    crew_stats = crew_gateway.stats()
+    st.caption(
+        f"GPT: {gpt_stats['running']}/{gpt_stats['max_concurrency']} running, {gpt_stats['queued']} queued · "
+        f"Crew Web Search: {crew_stats['running']}/{crew_stats['max_concurrency']} running, {crew_stats['queued']} queued"
+    )
+
     user_input = st.text_area("Ask any HDB related question:", placeholder="E.g., What are the new BTO launches in 2025?")
 
     if st.button("Submit"):
@@ -111,6 +162,20 @@ def display():
 
             display_messages(user_input)
 
+            # Route the question locally first; off-topic and FAQ questions need no upstream call
+            route = route_question(user_input)
+            if route.intent == OFF_TOPIC:
+                st.warning(route.answer)
+                return
+            if route.intent == FAQ:
+                with st.expander("Quick Answer", expanded=True):
+                    st.markdown(route.answer)
+                return
+
+            # Either backend may fail or be too busy, so only show the responses that arrived
+            assistant_response = None
+            websearch_response = None
+
             with st.spinner("Getting GPT response..."):
                 try:
 
@@ -124,46 +189,43 @@ def display():
                     Please provide a structured answer based on the above question. Your response should only contain information specific to the above question. Ensure your answer starts with "Answer: ".
                     """
 
-                    # Append the user's message to the conversation history
-                    st.session_state.messages.append({"role": "user", "content": prompt})
-
-                    # Make a request to OpenAI using ChatCompletion
-                    response = client.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=st.session_state.messages
-                    )
-
-                    # Extract and display the assistant's response
-                    assistant_response = response.choices[0].message.content
-                    st.session_state.messages.append({"role": "assistant", "content": assistant_response})
+                    # Make a request to OpenAI through the gateway; the user's message only joins
+                    # the conversation history once a response to it has arrived
+                    user_message = {"role": "user", "content": prompt}
+                    assistant_response = get_gpt_answer(messages + [user_message])
+                    messages.extend([user_message, {"role": "assistant", "content": assistant_response}])
 
                 except Exception as e:
                     st.error(f"An error occurred with GPT: {e}")
 
             # Display updated messages after getting GPT response
-            with st.expander("GPT Response", expanded=True):
-                st.markdown(assistant_response)
-
-            with st.spinner("Getting Crew Web Search response..."):
-                try:
-                    # Function to execute the agent workflow and return the answer
-                    def get_hdb_bto_answer(question):
-                        result = crew.kickoff(inputs={"question": question})
-                        with open("bto_answer.txt", "r") as file:
-                            return file.read()   
-                        
-                    # Call the function to get the answer
-                    websearch_response = get_hdb_bto_answer(prompt)
-
-                    # Add the web search results to the assistant's response
-                    st.session_state.messages.append({"role": "assistant", "content": "Additional info from HDB:\n" + websearch_response})
-
-                except Exception as e:
-                    st.error(f"An error occurred with Crew Web Search: {e}")
-
-            # Display the GPT response and web search response in collapsible sections
-            with st.expander("Additional Info from HDB", expanded=True):
-                st.markdown(websearch_response)
+            if assistant_response is not None:
+                with st.expander("GPT Response", expanded=True):
+                    st.markdown(assistant_response)
+
+            # Only questions about current or changing information need the crew's web research
+            if route.intent == RESEARCH:
+                with st.spinner("Getting Crew Web Search response..."):
+                    try:
+                        # Call the function to get the answer
+                        websearch_response = get_hdb_bto_answer(prompt)
+
+                        # Add the web search results to the assistant's response, with the user's
+                        # message if GPT failed to answer it
+                        if assistant_response is None:
+                            messages.append(user_message)
+                        messages.append({"role": "assistant", "content": "Additional info from HDB:\n" + websearch_response})
+
+                    except Exception as e:
+                        st.error(f"An error occurred with Crew Web Search: {e}")
+
+                # Display the GPT response and web search response in collapsible sections
+                if websearch_response is not None:
+                    with st.expander("Additional Info from HDB", expanded=True):
+                        st.markdown(websearch_response)
+
+            # Keep only the most recent messages so the history does not grow without bound
+            session_memory.put(session_id, 'messages', messages[-MAX_HISTORY_MESSAGES:])
         else:
             st.warning("Please enter a question.")
 
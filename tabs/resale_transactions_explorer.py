@@ -7,13 +7,54 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
 import altair as alt
+import pydeck as pdk
 import os
 import zipfile
 import pickle
+import re
+import io
+import numpy as np
+from chart_data import monthly_bins, downsample_series, compact_frame, MAX_CHART_POINTS, MAX_TABLE_ROWS
+from analytics import market_trends, month_ordinals
+from search_index import AddressSearchIndex
+from comparables import ComparablesIndex, price_distribution, DEFAULT_K, DEFAULT_MONTHS_BACK
+from price_model import PriceModel, CATEGORICAL_FEATURES, NUMERIC_INPUTS
+from town_map import town_price_cells, update_town_price_cells, town_price_summary, price_colours, MAP_CENTRE
+from row_hashing import row_hashes, snapshot_keys, cross_source_keep_mask, diff_snapshots
+from data_export import export_to_tempfile, remove_stale_exports, EXPORT_FORMATS
+from session_memory import session_memory
+from utility import get_session_id
+from shared_data import (
+    get_shared_data_dir, current_shared_version, publish_shared_data, attach_shared_data, publish_lock
+)
 
 # File path for storing the data locally
 LOCAL_DATA_ZIP_PATH = "resale_data.zip"
 PICKLE_FILE_NAME = "resale_data.pkl"
+VERSION_FILE_NAME = "version.txt"
+SEARCH_INDEX_FILE_NAME = "search_index.pkl"
+ROW_KEYS_FILE_NAME = "row_keys.npy"
+PRICE_MODEL_FILE_NAME = "price_model.pkl"
+TOWN_CELLS_FILE_NAME = "town_price_cells.pkl"
+# Lock file next to the ZIP, held while a process rewrites the ZIP or appends to it
+ZIP_LOCK_FILE_NAME = LOCAL_DATA_ZIP_PATH + ".lock"
+
+# Export files are written under the app's static directory, which the server streams from disk
+# in small chunks when server.enableStaticServing is set
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "exports")
+EXPORT_URL_PATH = "app/static/exports"
+# Largest file Streamlit serves from the static directory
+MAX_STATIC_FILE_BYTES = 200 * 1024 * 1024
+
+# HDB flats are sold on 99-year leases
+LEASE_TERM_MONTHS = 99 * 12
+
+# Session state keys of the filter selections, kept so evicted filtered results can be rebuilt
+FILTER_KEYS = [
+    'selected_years', 'search_query', 'selected_month', 'selected_town', 'selected_flat_type',
+    'selected_storey_range', 'floor_area_sqm_range', 'selected_flat_model',
+    'lease_commence_date_range', 'remaining_lease_range', 'resale_price_range',
+]
 
 # Function to load data from the ZIP file if available, else fetch new data
 def load_or_fetch_data():
@@ -22,6 +63,9 @@ def load_or_fetch_data():
         with zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'r') as zip_ref:
             with zip_ref.open(PICKLE_FILE_NAME) as pkl_file:
                 data = pickle.load(pkl_file)
+        # ZIP files saved before month precision only have whole years of remaining lease
+        if 'remaining_lease_months' not in data.columns:
+            data['remaining_lease_months'] = (data['remaining_lease'] * 12).astype('int16')
         return data
     else:
         # Fetch data and save to local ZIP file if not available
@@ -29,11 +73,174 @@ def load_or_fetch_data():
         save_data_to_zip(data)
         return data
     
-# Function to save the data to a ZIP file with higher compression
-def save_data_to_zip(data):
-    with zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zip_ref:
+# Function to save the data to a ZIP file with higher compression,
+# returning the diff against the previous snapshot's row keys if they are given.
+# previous_data is the previous snapshot in the row order of its keys, used to update
+# the town price cells from the diff instead of aggregating every row again.
+def save_data_to_zip(data, previous_keys=None, previous_data=None):
+    # Stamp the dataset with a version so cached analytics are rebuilt after an update
+    version = datetime.now().strftime('%Y%m%d%H%M%S')
+    row_keys = snapshot_keys(row_hashes(data))
+    diff = diff_snapshots(previous_keys, row_keys) if previous_keys is not None else None
+    previous_cells = load_town_price_cells(get_dataset_version())
+    can_update_cells = (
+        diff is not None and previous_cells is not None
+        and previous_data is not None and len(previous_data) == len(previous_keys)
+    )
+    if can_update_cells:
+        cells = update_town_price_cells(
+            previous_cells, data.iloc[diff.added_rows], previous_data.iloc[diff.removed_rows]
+        )
+    else:
+        cells = town_price_cells(data)
+    with publish_lock(get_zip_dir(), ZIP_LOCK_FILE_NAME), \
+            zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zip_ref:
         with zip_ref.open(PICKLE_FILE_NAME, 'w') as pkl_file:
             pickle.dump(data, pkl_file)
+        zip_ref.writestr(VERSION_FILE_NAME, version)
+        # Persist the block / street search index alongside the dataset it was built from
+        with zip_ref.open(SEARCH_INDEX_FILE_NAME, 'w') as index_file:
+            pickle.dump(AddressSearchIndex.build(data, version), index_file)
+        # Train the price model offline, once per dataset version
+        with zip_ref.open(PRICE_MODEL_FILE_NAME, 'w') as model_file:
+            pickle.dump(PriceModel.train(data, version), model_file)
+        # Town price cells are sums, so the next update can apply its diff to them
+        with zip_ref.open(TOWN_CELLS_FILE_NAME, 'w') as cells_file:
+            pickle.dump((version, cells), cells_file)
+        # One 64-bit key per row, so the next update can be diffed against this snapshot
+        with zip_ref.open(ROW_KEYS_FILE_NAME, 'w') as keys_file:
+            np.save(keys_file, row_keys)
+    return diff
+
+# Function to get the directory holding the ZIP file, where its lock file is kept
+def get_zip_dir():
+    return os.path.dirname(os.path.abspath(LOCAL_DATA_ZIP_PATH))
+
+# Function to append an entry to ZIP files saved before the entry existed. Strings are written
+# as text and other objects pickled. The entry list is checked again under the ZIP lock, so
+# concurrent sessions append it once, and nothing is appended if the ZIP now holds another
+# dataset version than data_version.
+def append_to_zip_once(name, obj, data_version=None):
+    if not os.path.exists(LOCAL_DATA_ZIP_PATH):
+        return
+    with publish_lock(get_zip_dir(), ZIP_LOCK_FILE_NAME):
+        with zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'r') as zip_ref:
+            names = zip_ref.namelist()
+            zip_version = zip_ref.read(VERSION_FILE_NAME).decode() if VERSION_FILE_NAME in names else None
+        if name in names or (data_version is not None and zip_version != data_version):
+            return
+        with zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'a', compression=zipfile.ZIP_DEFLATED) as zip_ref:
+            if isinstance(obj, str):
+                zip_ref.writestr(name, obj)
+            else:
+                with zip_ref.open(name, 'w') as entry_file:
+                    pickle.dump(obj, entry_file)
+
+# Function to load the town price cells persisted for a dataset version, or None if the ZIP has none
+def load_town_price_cells(data_version):
+    if data_version is None or not os.path.exists(LOCAL_DATA_ZIP_PATH):
+        return None
+    with zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'r') as zip_ref:
+        if TOWN_CELLS_FILE_NAME not in zip_ref.namelist():
+            return None
+        with zip_ref.open(TOWN_CELLS_FILE_NAME) as cells_file:
+            cells_version, cells = pickle.load(cells_file)
+    return cells if cells_version == data_version else None
+
+# Function to load the row keys of the local snapshot, computing them for ZIP files saved without them
+def load_row_keys():
+    if not os.path.exists(LOCAL_DATA_ZIP_PATH):
+        return None
+    with zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'r') as zip_ref:
+        if ROW_KEYS_FILE_NAME in zip_ref.namelist():
+            return np.load(io.BytesIO(zip_ref.read(ROW_KEYS_FILE_NAME)))
+    return snapshot_keys(row_hashes(load_or_fetch_data()))
+
+# Function to get the version of the local dataset, used to key cached analytics
+def get_dataset_version():
+    if not os.path.exists(LOCAL_DATA_ZIP_PATH):
+        return None
+    with zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'r') as zip_ref:
+        if VERSION_FILE_NAME in zip_ref.namelist():
+            return zip_ref.read(VERSION_FILE_NAME).decode()
+    # ZIP files saved before versioning have no version entry, so stamp one from the modified date;
+    # another session may have stamped it first, so the entry is read back
+    version = get_zip_modified_date(LOCAL_DATA_ZIP_PATH).strftime('%Y%m%d%H%M%S')
+    append_to_zip_once(VERSION_FILE_NAME, version)
+    with zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'r') as zip_ref:
+        return zip_ref.read(VERSION_FILE_NAME).decode()
+
+# Function to load the search index persisted with the dataset, building it if the ZIP has none
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_search_index(_data, data_version):
+    if os.path.exists(LOCAL_DATA_ZIP_PATH):
+        with zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'r') as zip_ref:
+            if SEARCH_INDEX_FILE_NAME in zip_ref.namelist():
+                with zip_ref.open(SEARCH_INDEX_FILE_NAME) as index_file:
+                    search_index = pickle.load(index_file)
+                if (search_index.version == data_version and search_index.n_rows == len(_data)
+                        and getattr(search_index, 'format_version', None) == AddressSearchIndex.FORMAT_VERSION):
+                    return search_index
+
+    search_index = AddressSearchIndex.build(_data, data_version)
+    # ZIP files saved before the index existed get it appended once
+    append_to_zip_once(SEARCH_INDEX_FILE_NAME, search_index, data_version)
+    return search_index
+
+# Function to load the price model persisted with the dataset, training it if the ZIP has none
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_price_model(_data, data_version):
+    if os.path.exists(LOCAL_DATA_ZIP_PATH):
+        with zipfile.ZipFile(LOCAL_DATA_ZIP_PATH, 'r') as zip_ref:
+            if PRICE_MODEL_FILE_NAME in zip_ref.namelist():
+                with zip_ref.open(PRICE_MODEL_FILE_NAME) as model_file:
+                    price_model = pickle.load(model_file)
+                if price_model.version == data_version:
+                    return price_model
+
+    price_model = PriceModel.train(_data, data_version)
+    # ZIP files saved before the model existed get it appended once
+    append_to_zip_once(PRICE_MODEL_FILE_NAME, price_model, data_version)
+    return price_model
+
+# Function to attach the shared dataset once per process and version
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_shared_data(shared_dir, shared_version):
+    return attach_shared_data(shared_dir, shared_version)
+
+# Function to publish the dataset to the shared directory used by every server process on the host
+def publish_session_data(data, shared_dir):
+    with publish_lock(shared_dir):
+        return publish_shared_data(compact_frame(data), get_dataset_version(), shared_dir)
+
+# Function to load the local dataset once per process and version, shared read-only by every session
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_local_data(data_version):
+    # Dictionary-encode repeated strings and narrow numeric dtypes once,
+    # so every filtered view and table payload is compact as well
+    return compact_frame(load_or_fetch_data())
+
+# Function to load the dataset for a new session, returning the data and its version
+def load_session_data():
+    shared_dir = get_shared_data_dir()
+    if shared_dir is None:
+        data_version = get_dataset_version()
+        if data_version is None:
+            # Nothing to share yet; fetch and save the dataset first
+            data = compact_frame(load_or_fetch_data())
+            return data, get_dataset_version()
+        return get_local_data(data_version), data_version
+
+    # In shared memory mode the first process publishes and the others attach read-only views
+    shared_version = current_shared_version(shared_dir)
+    if shared_version is None:
+        with publish_lock(shared_dir):
+            shared_version = current_shared_version(shared_dir)
+            if shared_version is None:
+                shared_version = publish_shared_data(
+                    compact_frame(load_or_fetch_data()), get_dataset_version(), shared_dir
+                )
+    return get_shared_data(shared_dir, shared_version), shared_version
 
 # Function to get the modified date of the ZIP file
 def get_zip_modified_date(LOCAL_DATA_ZIP_PATH):
@@ -44,10 +251,31 @@ def get_zip_modified_date(LOCAL_DATA_ZIP_PATH):
     
 # Button to fetch the latest data and update the ZIP file
 def update_data():
+    previous_keys = load_row_keys()
+    # The session's data is the previous snapshot if it is still the version in the ZIP file
+    previous_data = None
+    if st.session_state.get('data_version') == get_dataset_version():
+        previous_data = st.session_state.get('data')
     data = fetch_full_data()
-    save_data_to_zip(data)
-    st.success("Data updated successfully!")
-    st.session_state.data = data
+    diff = save_data_to_zip(data, previous_keys, previous_data)
+    if diff is not None:
+        st.success(
+            f"Data updated successfully! {len(diff.added_rows):,} transactions added, "
+            f"{len(diff.removed_rows):,} removed."
+        )
+    else:
+        st.success("Data updated successfully!")
+    shared_dir = get_shared_data_dir()
+    # Filtered results of the old data are rebuilt from the selections on the new data
+    session_memory.pop(get_session_id(), 'filtered_data')
+    if shared_dir is None:
+        st.session_state.data_version = get_dataset_version()
+        st.session_state.data = get_local_data(st.session_state.data_version)
+    else:
+        # Hand the new version to every process on the host; their sessions switch on their next rerun
+        shared_version = publish_session_data(data, shared_dir)
+        st.session_state.data = get_shared_data(shared_dir, shared_version)
+        st.session_state.data_version = shared_version
 
 # Fetching the collection metadata from the main API
 def fetch_collection_metadata(collection_id):
@@ -91,6 +319,26 @@ def fetch_dataset(dataset_id):
     st.warning(f"Failed to fetch data for dataset {dataset_id} after {MAX_POLLS} attempts.")
     return pd.DataFrame()  # Return empty DataFrame if download fails
 
+# Function to parse remaining_lease into a whole number of months
+def parse_remaining_lease_months(remaining_lease, lease_commence_date, month):
+    # Values look like '61 years 04 months', '61 years', 70 or NaN depending on the child dataset.
+    # Parse each distinct value once and broadcast back through the codes.
+    codes, values = pd.factorize(remaining_lease.astype('string'), use_na_sentinel=True)
+    parts = pd.Series(values, dtype='string').str.extract(
+        r'^\s*(\d+)(?:\.\d+)?\s*(?:years?)?\s*(?:(\d+)\s*months?)?', flags=re.IGNORECASE
+    )
+    parsed = (parts[0].astype(float) * 12 + parts[1].astype(float).fillna(0)).to_numpy()
+    months = np.where(codes >= 0, parsed[codes] if len(parsed) else np.nan, np.nan)
+
+    # Missing values are computed from the lease commencement year as at each transaction's month
+    lease_start = lease_commence_date.to_numpy(dtype=float) * 12
+    elapsed = month_ordinals(month) - lease_start
+    calculated = np.clip(LEASE_TERM_MONTHS - elapsed, 0, LEASE_TERM_MONTHS)
+    calculated[lease_start <= 0] = -1  # Unknown lease_commence_date is filled with -1
+    months = np.where(np.isnan(months), calculated, months)
+
+    return pd.Series(months, index=remaining_lease.index).astype('int16')
+
 def fetch_full_data():
     with st.spinner("Fetching Resale Flat Transactions Data from data.gov.sg ..."):
         collection_id = 189  # Collection ID for HDB resale prices
@@ -132,16 +380,14 @@ def fetch_full_data():
                         'resale_price': -1
                     }, inplace=True)
 
-                    full_data['remaining_lease'] = full_data['remaining_lease'].str.split(' ').str[0]
-
-                    # Calculate the remaining lease based on the lease_commence_date for each row
-                    full_data['calculated_remaining_lease'] = 100 - (datetime.now().year - full_data['lease_commence_date'])
-
-                    # Use fillna to replace NaN values in remaining_lease with values from calculated_remaining_lease
-                    full_data['remaining_lease'] = full_data['remaining_lease'].fillna(full_data['calculated_remaining_lease'])
-
-                    # Drop the temporary column if it is no longer needed
-                    full_data.drop(columns=['calculated_remaining_lease'], inplace=True)
+                    # Remaining lease in months, with gaps computed relative to each transaction's month
+                    full_data['remaining_lease_months'] = parse_remaining_lease_months(
+                        full_data['remaining_lease'],
+                        full_data['lease_commence_date'],
+                        full_data['month']
+                    )
+                    # Whole years are kept for the filters and table
+                    full_data['remaining_lease'] = full_data['remaining_lease_months'] // 12
 
                     full_data['flat_type'] = full_data['flat_type'].str.replace('-', ' ')
 
@@ -156,8 +402,13 @@ def fetch_full_data():
                     full_data['flat_model'] = full_data['flat_model'].astype(str) 
                     full_data['lease_commence_date'] = full_data['lease_commence_date'].astype(int)
                     full_data['remaining_lease'] = full_data['remaining_lease'].astype(int)  
+                    full_data['remaining_lease_months'] = full_data['remaining_lease_months'].astype('int16')
                     full_data['resale_price'] = full_data['resale_price'].astype(float)  
 
+                    # Drop transactions repeated across overlapping child datasets
+                    sources = np.repeat(np.arange(len(all_records)), [len(df) for df in all_records])
+                    full_data = full_data[cross_source_keep_mask(row_hashes(full_data), sources)]
+
                     full_data = full_data.sort_values(by='month', ascending=False).reset_index(drop=True)
                     full_data.reset_index(drop=True, inplace=True)
 
@@ -167,7 +418,7 @@ def fetch_full_data():
 
 def alt_plot_price_by_town(data):
     # Group by town and calculate the average resale price
-    avg_price_by_town = data.groupby('town')['resale_price'].mean().sort_values(ascending=False)
+    avg_price_by_town = data.groupby('town', observed=True)['resale_price'].mean().sort_values(ascending=False)
     
     # Convert to DataFrame
     avg_price_by_town_df = avg_price_by_town.reset_index()
@@ -191,7 +442,7 @@ def alt_plot_price_by_town(data):
 
 def alt_plot_price_by_flat_type(data):
     # Group by flat type and calculate the average resale price
-    avg_price_by_flat_type = data.groupby('flat_type')['resale_price'].mean().sort_values(ascending=False)
+    avg_price_by_flat_type = data.groupby('flat_type', observed=True)['resale_price'].mean().sort_values(ascending=False)
 
     # Convert to DataFrame
     avg_price_by_flat_type_df = avg_price_by_flat_type.reset_index()
@@ -214,11 +465,11 @@ def alt_plot_price_by_flat_type(data):
     st.altair_chart(chart, use_container_width=True)
 
 def alt_plot_price_by_year(data):
-    # Extract the year from the 'month' column
-    data['year'] = pd.to_datetime(data['month']).dt.year
+    # Extract the year from the integer month ordinals without parsing dates
+    year = pd.Series(month_ordinals(data['month']) // 12, index=data.index, name='year')
 
     # Calculate the average resale price per year
-    avg_price_by_year = data.groupby('year', as_index=False)['resale_price'].mean()
+    avg_price_by_year = data['resale_price'].groupby(year).mean().reset_index()
     avg_price_by_year.columns = ['Year', 'Average Resale Price']
 
     # Create an Altair line chart
@@ -234,6 +485,391 @@ def alt_plot_price_by_year(data):
 
     st.altair_chart(line_chart, use_container_width=True)
 
+def alt_plot_median_price_by_month(data):
+    # Aggregate to monthly bins on the server and cap the number of points sent to the browser
+    median_by_month = monthly_bins(data, value='resale_price', agg='median')
+    median_by_month = downsample_series(median_by_month, 'month', 'resale_price', max_points=MAX_CHART_POINTS)
+    median_by_month.columns = ['Month', 'Median Resale Price', 'Transactions']
+
+    line_chart = alt.Chart(median_by_month).mark_line().encode(
+        x=alt.X('Month:T', title='Month'),
+        y=alt.Y('Median Resale Price', title='Median Resale Price'),
+        tooltip=['Month', 'Median Resale Price', 'Transactions']
+    ).properties(
+        title="Median Resale Price by Month",
+        width=700,
+        height=400
+    )
+
+    st.altair_chart(line_chart, use_container_width=True)
+
+
+# Function to compute the market trends once per dataset version and grouping
+@st.cache_data(show_spinner=False, max_entries=8)
+def get_market_trends(_data, data_version, by):
+    return market_trends(_data, by)
+
+def alt_plot_market_trends(data, data_version, selected_town, selected_flat_type):
+    metrics = {
+        "Rolling 12-Month Median Price": "rolling_12m_median",
+        "Rolling 3-Month Median Price": "rolling_3m_median",
+        "Monthly Median Price": "median_price",
+        "Monthly Median Price per sqm": "median_price_per_sqm",
+        "Year-over-Year Change": "yoy_change",
+    }
+    metric_label = st.selectbox("Select Market Trend Metric", options=list(metrics))
+    metric = metrics[metric_label]
+
+    # Break the trend down by the towns and flat types currently applied in the filters
+    by = []
+    if selected_town:
+        by.append('town')
+    if selected_flat_type:
+        by.append('flat_type')
+    trends = get_market_trends(data, data_version, tuple(by))
+
+    if selected_town:
+        trends = trends[trends['town'].isin(selected_town)]
+    if selected_flat_type:
+        trends = trends[trends['flat_type'].isin(selected_flat_type)]
+    if by:
+        series = trends[by].agg(' - '.join, axis=1)
+    else:
+        series = pd.Series("All Towns", index=trends.index)
+
+    chart_data = pd.DataFrame({
+        'Month': trends['month'],
+        'Series': series,
+        metric_label: trends[metric],
+        'Transactions': trends['transactions'],
+    }).dropna()
+
+    y_format = '.1%' if metric == 'yoy_change' else ',.0f'
+    line_chart = alt.Chart(chart_data).mark_line().encode(
+        x=alt.X('Month:T', title='Month'),
+        y=alt.Y(metric_label, title=metric_label, axis=alt.Axis(format=y_format)),
+        color=alt.Color('Series', title=None),
+        tooltip=['Month', 'Series', alt.Tooltip(metric_label, format=y_format), 'Transactions']
+    ).properties(
+        title=f"{metric_label} Over Time",
+        width=700,
+        height=400
+    )
+
+    st.altair_chart(line_chart, use_container_width=True)
+
+# Function to load the town price cells persisted with the dataset, aggregating them if the ZIP has none
+@st.cache_data(show_spinner=False, max_entries=2)
+def get_town_price_cells(_data, data_version):
+    cells = load_town_price_cells(data_version)
+    if cells is not None:
+        return cells
+
+    cells = town_price_cells(_data)
+    # ZIP files saved before the cells existed get them appended once
+    append_to_zip_once(TOWN_CELLS_FILE_NAME, (data_version, cells), data_version)
+    return cells
+
+# Function to list the applied filters that the town map does not follow, as they are not
+# dimensions of the pre-aggregated cells
+def get_map_ignored_filters(data, filters):
+    ignored = ["block / street search"] if filters['search_query'].strip() else []
+    for label, key in [
+        ("month", 'selected_month'), ("storey range", 'selected_storey_range'), ("flat model", 'selected_flat_model'),
+    ]:
+        if filters[key]:
+            ignored.append(label)
+    # Range filters only count when they leave out part of the data
+    for label, column, key in [
+        ("floor area", 'floor_area_sqm', 'floor_area_sqm_range'),
+        ("lease commence date", 'lease_commence_date', 'lease_commence_date_range'),
+        ("remaining lease", 'remaining_lease', 'remaining_lease_range'),
+        ("resale price", 'resale_price', 'resale_price_range'),
+    ]:
+        low, high = filters[key]
+        if low > int(data[column].min()) or high < int(data[column].max()):
+            ignored.append(label)
+    return ignored
+
+def display_town_map(data, data_version, selected_years, selected_town, selected_flat_type, ignored_filters=()):
+    # Only the pre-aggregated cells are filtered, so the map is one row per town for any selection
+    summary = town_price_summary(
+        get_town_price_cells(data, data_version),
+        years=selected_years, towns=selected_town, flat_types=selected_flat_type
+    )
+    unmapped = summary[summary['latitude'].isna()]
+    summary = summary.dropna(subset=['latitude', 'longitude'])
+    if summary.empty:
+        st.warning("No transactions to map for the applied filters.")
+        return
+
+    colours, position = price_colours(summary['price_per_sqm'])
+    summary = summary.assign(
+        colour=colours,
+        # Column heights show how each town compares with the cheapest and dearest towns shown
+        elevation=200 + 3000 * position,
+        price_per_sqm_label=summary['price_per_sqm'].map('${:,.0f}'.format),
+        average_price_label=summary['average_price'].map('${:,.0f}'.format),
+    )
+
+    layer = pdk.Layer(
+        "ColumnLayer",
+        data=summary,
+        get_position=["longitude", "latitude"],
+        get_elevation="elevation",
+        get_fill_color="colour",
+        radius=600,
+        extruded=True,
+        pickable=True,
+    )
+    st.pydeck_chart(pdk.Deck(
+        layers=[layer],
+        initial_view_state=pdk.ViewState(latitude=MAP_CENTRE[0], longitude=MAP_CENTRE[1], zoom=10.2, pitch=40),
+        tooltip={"text": "{town}\nAverage price per sqm: {price_per_sqm_label}\n"
+                         "Average price: {average_price_label}\nTransactions: {transactions}"},
+    ))
+    ignored_list = ", ".join(ignored_filters[:-1])
+    ignored_list = f"{ignored_list} and {ignored_filters[-1]}" if ignored_list else "".join(ignored_filters)
+    st.caption(
+        f"Average resale price per sqm by town for {selected_years[0]} - {selected_years[1]}, "
+        "coloured from yellow (lowest) to red (highest)."
+        + (f" Towns without coordinates are not shown: {', '.join(unmapped['town'])}." if len(unmapped) else "")
+        + (f" The map only follows the year, town and flat type filters, so it ignores the applied "
+           f"{ignored_list} filters." if ignored_filters else "")
+    )
+
+# Function to build the comparables index once per dataset version
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_comparables_index(_data, data_version):
+    return ComparablesIndex(_data, data_version)
+
+def display_comparables(data, data_version):
+    st.write("Find recent transactions similar to a flat by town, flat type, floor area, storey, remaining lease and flat model.")
+
+    with st.form(key='comparables_form'):
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            towns = st.multiselect(
+                "Town (add nearby towns to widen the search)",
+                options=sorted(data['town'].unique())
+            )
+            flat_type = st.selectbox(
+                "Flat Type",
+                options=sorted(data['flat_type'].unique(), reverse=True)
+            )
+            flat_model = st.selectbox(
+                "Flat Model",
+                options=["Any"] + sorted(data['flat_model'].unique())
+            )
+
+        with col2:
+            floor_area_sqm = st.number_input("Floor Area (sqm)", min_value=1, max_value=400, value=90, step=1)
+            storey_range = st.selectbox(
+                "Storey Range",
+                options=sorted(data['storey_range'].unique())
+            )
+            remaining_lease = st.number_input("Remaining Lease (Years)", min_value=0, max_value=99, value=70, step=1)
+
+        with col3:
+            k = st.slider("Number of Comparables", min_value=5, max_value=50, value=DEFAULT_K, step=5)
+            months_back = st.slider("Look Back (Months)", min_value=6, max_value=120, value=DEFAULT_MONTHS_BACK, step=6)
+
+        submitted = st.form_submit_button("Find Comparables")
+
+    if submitted:
+        if not towns:
+            st.warning("Please select at least one town.")
+            return
+
+        comparables_index = get_comparables_index(data, data_version)
+        rows, distances = comparables_index.query(
+            towns, flat_type, floor_area_sqm, storey_range, remaining_lease,
+            flat_model=None if flat_model == "Any" else flat_model,
+            k=k, months_back=months_back
+        )
+        if len(rows) == 0:
+            st.warning("No comparable transactions found. Try adding nearby towns or looking further back.")
+            return
+
+        comparables = data.iloc[rows]
+        stats = price_distribution(comparables)
+
+        median_col, range_col, psf_col = st.columns(3)
+        median_col.metric("Median Resale Price", f"${stats['median']:,.0f}")
+        range_col.metric("Interquartile Range", f"${stats['p25']:,.0f} - ${stats['p75']:,.0f}")
+        psf_col.metric("Median Price per sqm", f"${stats['median_price_per_sqm']:,.0f}")
+
+        st.dataframe(
+            comparables.assign(similarity_distance=distances),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "lease_commence_date": st.column_config.NumberColumn(format="%d"),
+                "similarity_distance": st.column_config.NumberColumn(format="%.2f")
+            }
+        )
+
+def display_price_estimate(data, data_version):
+    st.write(
+        "Estimate a flat's resale price with a model trained on all transactions, "
+        "or upload a CSV file of listings to estimate them in one batch."
+    )
+
+    with st.form(key='price_estimate_form'):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            town = st.selectbox("Town", options=sorted(data['town'].unique()), key='estimate_town')
+            flat_type = st.selectbox("Flat Type", options=sorted(data['flat_type'].unique(), reverse=True), key='estimate_flat_type')
+            flat_model = st.selectbox("Flat Model", options=sorted(data['flat_model'].unique()), key='estimate_flat_model')
+
+        with col2:
+            floor_area_sqm = st.number_input("Floor Area (sqm)", min_value=1, max_value=400, value=90, step=1, key='estimate_floor_area_sqm')
+            storey_range = st.selectbox("Storey Range", options=sorted(data['storey_range'].unique()), key='estimate_storey_range')
+            remaining_lease = st.number_input("Remaining Lease (Years)", min_value=1, max_value=99, value=70, step=1, key='estimate_remaining_lease')
+
+        submitted = st.form_submit_button("Estimate Price")
+
+    # Columns a listings file needs; month is optional and defaults to the latest month
+    required_columns = [column for column in CATEGORICAL_FEATURES if column != 'month'] + NUMERIC_INPUTS
+    uploaded_file = st.file_uploader(
+        f"Estimate listings from a CSV file (columns: {', '.join(required_columns)}, and optionally month as YYYY-MM)",
+        type="csv"
+    )
+
+    if not submitted and uploaded_file is None:
+        return
+    price_model = get_price_model(data, data_version)
+
+    if submitted:
+        listing = pd.DataFrame([{
+            'town': town, 'flat_type': flat_type, 'storey_range': storey_range, 'flat_model': flat_model,
+            'floor_area_sqm': floor_area_sqm, 'remaining_lease': remaining_lease
+        }])
+        st.metric("Estimated Resale Price", f"${price_model.predict(listing)[0]:,.0f}")
+
+    if uploaded_file is not None:
+        listings = pd.read_csv(uploaded_file)
+        missing_columns = [column for column in required_columns if column not in listings.columns]
+        if missing_columns:
+            st.error(f"The file is missing these columns: {', '.join(missing_columns)}")
+        else:
+            # Every listing is scored in one vectorized call
+            estimates = listings.assign(estimated_price=price_model.predict(listings).round(-3))
+            st.write(f"Estimated **{len(estimates):,}** listings.")
+            st.dataframe(estimates, hide_index=True, use_container_width=True)
+            st.download_button(
+                "Download Estimates",
+                data=estimates.to_csv(index=False),
+                file_name="hdb_price_estimates.csv",
+                mime="text/csv"
+            )
+
+    st.caption(
+        f"Estimates are for the latest month unless a month is given. The model was trained on "
+        f"{price_model.stats['n_rows']:,} transactions; its median error on them is "
+        f"{price_model.stats['median_abs_pct_error']:.1f}%."
+    )
+
+# Function to delete the prepared export file of this session, if any
+def discard_export():
+    export_path = st.session_state.pop('export_path', None)
+    st.session_state.pop('export_stats', None)
+    if export_path and os.path.exists(export_path):
+        os.remove(export_path)
+
+def display_export(filtered_data):
+    # Exports of sessions that ended or were evicted are removed once they outlive their time to live
+    remove_stale_exports(EXPORT_DIR)
+    format_col, button_col, spacer = st.columns([2, 2, 12])
+
+    with format_col:
+        export_format = st.selectbox("Export Format", options=list(EXPORT_FORMATS), label_visibility="collapsed")
+
+    with button_col:
+        if st.button("Prepare Export"):
+            discard_export()
+            with st.spinner("Exporting filtered results..."):
+                # Rows are written in chunks to a file instead of being built up in memory
+                os.makedirs(EXPORT_DIR, exist_ok=True)
+                export_path, export_stats = export_to_tempfile(filtered_data, export_format, directory=EXPORT_DIR)
+            st.session_state.export_path = export_path
+            st.session_state.export_stats = export_stats
+            st.session_state.export_format = export_format
+
+    export_path = st.session_state.get('export_path')
+    if export_path and os.path.exists(export_path):
+        export_stats = st.session_state.export_stats
+        extension, _ = EXPORT_FORMATS[st.session_state.export_format]
+        st.caption(
+            f"Exported {export_stats['rows']:,} rows ({export_stats['bytes'] / 1_000_000:.1f} MB) "
+            f"in {export_stats['seconds']:.2f} s · {export_stats['rows_per_second']:,.0f} rows/s"
+        )
+        # A download button would read the whole file into the server's media store on every
+        # rerun, so the file is linked instead and the server streams it from disk
+        if not st.get_option("server.enableStaticServing"):
+            st.warning("Downloads need static file serving. Set enableStaticServing = true under [server] in .streamlit/config.toml.")
+        elif export_stats['bytes'] > MAX_STATIC_FILE_BYTES:
+            st.warning("This export is too large to download as a file. Please choose Parquet or narrow the filters.")
+        else:
+            st.markdown(
+                f'<a href="{EXPORT_URL_PATH}/{os.path.basename(export_path)}" '
+                f'download="hdb_resale_transactions{extension}">⬇️ Download {st.session_state.export_format}</a>',
+                unsafe_allow_html=True
+            )
+
+# Function to apply the filter selections to the data
+def filter_data(data, data_version, filters):
+    # Initialize filtered data with the full dataset, or the rows matching the search
+    if filters['search_query'].strip():
+        search_index = get_search_index(data, data_version)
+        filtered_data = data.iloc[search_index.search(filters['search_query'])]
+    else:
+        # Boolean filters below return new frames, so the full table is not copied here
+        filtered_data = data
+
+    # Apply filters only if selections are made
+    if filters['selected_years']:
+        # Get the start and end years from the selected_years tuple
+        start_year, end_year = filters['selected_years']
+
+        # Filter the data to include only rows with months in the selected year range
+        filtered_data = filtered_data[
+            filtered_data['month'].str[:4].astype(int).between(start_year, end_year)
+        ]
+    if filters['selected_month']:
+        filtered_data = filtered_data[filtered_data['month'].isin(filters['selected_month'])]
+    if filters['selected_town']:
+        filtered_data = filtered_data[filtered_data['town'].isin(filters['selected_town'])]
+    if filters['selected_flat_type']:
+        filtered_data = filtered_data[filtered_data['flat_type'].isin(filters['selected_flat_type'])]
+    if filters['selected_storey_range']:
+        filtered_data = filtered_data[filtered_data['storey_range'].isin(filters['selected_storey_range'])]
+    if filters['selected_flat_model']:
+        filtered_data = filtered_data[filtered_data['flat_model'].isin(filters['selected_flat_model'])]
+
+    # Apply slider filters
+    return filtered_data[
+        (filtered_data['floor_area_sqm'].between(*filters['floor_area_sqm_range'])) &
+        (filtered_data['lease_commence_date'].between(*filters['lease_commence_date_range'])) &
+        (filtered_data['remaining_lease'].between(*filters['remaining_lease_range'])) &
+        (filtered_data['resale_price'].between(*filters['resale_price_range']))
+    ]
+
+# Function to get this session's filtered results, rebuilding them from the stored selections
+# if they were evicted while the session was idle or the process was over its memory budget
+def get_filtered_data(data):
+    # Until filters are applied the full dataset is shown, which costs the session nothing
+    if not st.session_state.get('filters_applied', False):
+        return data
+    session_id = get_session_id()
+    filtered_data = session_memory.get(session_id, 'filtered_data')
+    if filtered_data is None:
+        filters = {key: st.session_state[key] for key in FILTER_KEYS}
+        filtered_data = filter_data(data, st.session_state.data_version, filters)
+        session_memory.put(session_id, 'filtered_data', filtered_data)
+    return filtered_data
 
 # Main function to display the resale prices
 def display():
@@ -274,9 +910,10 @@ def display():
 
     # Initialize session state data
     if 'data' not in st.session_state:
-        st.session_state.data = load_or_fetch_data()
-        st.session_state.filtered_data = st.session_state.data
+        st.session_state.data, st.session_state.data_version = load_session_data()
+        st.session_state.filters_applied = False
         st.session_state.selected_years = (int(st.session_state.data['month'].str[:4].min()), int(st.session_state.data['month'].str[:4].max()))
+        st.session_state.search_query = ""
         st.session_state.selected_month = []
         st.session_state.selected_town = []
         st.session_state.selected_flat_type = []
@@ -299,6 +936,17 @@ def display():
             int(st.session_state.data['resale_price'].max())
         )
 
+    # In shared memory mode, switch to a refreshed dataset published by another process
+    shared_dir = get_shared_data_dir()
+    if shared_dir is not None:
+        shared_version = current_shared_version(shared_dir)
+        if shared_version is not None and shared_version != st.session_state.data_version:
+            st.session_state.data = get_shared_data(shared_dir, shared_version)
+            st.session_state.data_version = shared_version
+            # Filtered results of the old version are rebuilt from the selections on the new one
+            session_memory.pop(get_session_id(), 'filtered_data')
+            discard_export()
+
     data = st.session_state.data
 
     # Get min and max year from the month data
@@ -316,6 +964,13 @@ def display():
             step=1
         )
 
+        # Search by block and street name using the prebuilt index
+        search_query = st.text_input(
+            "Search Block / Street",
+            value=st.session_state.search_query,
+            placeholder="E.g., 123 Ang Mo Kio Ave 3"
+        )
+
         # Create two rows of filters
         row1_col1, row1_col2, row1_col3 = st.columns(3)
 
@@ -399,6 +1054,7 @@ def display():
             if st.form_submit_button("Apply Filters"):
                 # Store selections in session state
                 st.session_state.selected_years = selected_years
+                st.session_state.search_query = search_query
                 st.session_state.selected_month = selected_month
                 st.session_state.selected_town = selected_town
                 st.session_state.selected_flat_type = selected_flat_type
@@ -409,51 +1065,22 @@ def display():
                 st.session_state.remaining_lease_range = remaining_lease_range
                 st.session_state.resale_price_range = resale_price_range
                 
-                # Initialize filtered data with the full dataset
-                filtered_data = data.copy()
-                
-                # Apply filters only if selections are made
-                if selected_years:
-                    # Get the start and end years from the selected_years tuple
-                    start_year, end_year = selected_years
-
-                    # Filter the data to include only rows with months in the selected year range
-                    filtered_data = filtered_data[
-                        filtered_data['month'].str[:4].astype(int).between(start_year, end_year)
-                    ]
-                if selected_month:
-                    filtered_data = filtered_data[filtered_data['month'].isin(selected_month)]
-                if selected_town:
-                    filtered_data = filtered_data[filtered_data['town'].isin(selected_town)]
-                if selected_flat_type:
-                    filtered_data = filtered_data[filtered_data['flat_type'].isin(selected_flat_type)]
-                if selected_storey_range:
-                    filtered_data = filtered_data[filtered_data['storey_range'].isin(selected_storey_range)]
-                if selected_flat_model:
-                    filtered_data = filtered_data[filtered_data['flat_model'].isin(selected_flat_model)]
-
-                # Apply slider filters
-                filtered_data = filtered_data[
-                    (filtered_data['floor_area_sqm'].between(*floor_area_sqm_range)) &
-                    (filtered_data['lease_commence_date'].between(*lease_commence_date_range)) &
-                    (filtered_data['remaining_lease'].between(*remaining_lease_range)) &
-                    (filtered_data['resale_price'].between(*resale_price_range))
-                ]
-
-                # Store the filtered data in session state
-                st.session_state.filtered_data = filtered_data
+                # Filter the data and keep the results in this session's share of the memory budget
+                st.session_state.filters_applied = True
+                filters = {key: st.session_state[key] for key in FILTER_KEYS}
+                filtered_data = filter_data(data, st.session_state.data_version, filters)
+                session_memory.put(get_session_id(), 'filtered_data', filtered_data)
+                # An export of the previous results is stale
+                discard_export()
 
         with warning_col:
             st.write("Note: Results will update only after clicking on the Apply Filters button.")
 
         # Display the filtered data or the full data if no search has been performed yet
-        filtered_data = st.session_state.get('filtered_data', data)
+        filtered_data = get_filtered_data(data)
 
-        # Save a separate DataFrame for display
-        display_data = filtered_data.copy()
-
-        # Convert lease_commence_date to string format without commas
-        display_data['lease_commence_date'] = display_data['lease_commence_date'].astype(str)
+        # Display the filtered data as is; st.dataframe serializes it with Arrow
+        display_data = filtered_data
 
         # Add vertical spacing above using markdown
         st.markdown("<br>" * 1, unsafe_allow_html=True)  # Adjust the number for more spacing
@@ -466,9 +1093,22 @@ def display():
             st.write(f"Resale Flat Records Found: **{len(display_data)}**")
 
         with sort_warning:
-            st.write("Sort by clicking the column headers (<~150k Results)")
-
-        st.dataframe(display_data, hide_index=True, use_container_width=True)  # Ensure the table fills the width
+            st.write("Sort by clicking the column headers")
+
+        st.dataframe(
+            display_data.iloc[:MAX_TABLE_ROWS],
+            hide_index=True,
+            use_container_width=True,  # Ensure the table fills the width
+            column_config={
+                # Show lease_commence_date without thousands separators
+                "lease_commence_date": st.column_config.NumberColumn(format="%d")
+            }
+        )
+        if len(display_data) > MAX_TABLE_ROWS:
+            st.caption(
+                f"Showing the first {MAX_TABLE_ROWS:,} of {len(display_data):,} records; sorting applies to "
+                "the rows shown. Export the filtered results below to get every record."
+            )
 
         # Add vertical spacing above using markdown
         st.markdown("<br>" * 1, unsafe_allow_html=True)  # Adjust the number for more spacing
@@ -476,6 +1116,36 @@ def display():
         alt_plot_price_by_town(display_data)
         alt_plot_price_by_flat_type(display_data)
         alt_plot_price_by_year(display_data)
+        alt_plot_median_price_by_month(display_data)
+
+    # Export the filtered results shown in the table
+    display_export(filtered_data)
+
+    # Market trends are computed over the full history, broken down by the applied town and flat type filters
+    st.subheader("Market Trends")
+    alt_plot_market_trends(
+        data,
+        st.session_state.data_version,
+        st.session_state.selected_town,
+        st.session_state.selected_flat_type
+    )
+
+    # The map follows the applied year, town and flat type filters and names the others it ignores
+    st.subheader("Price Map")
+    display_town_map(
+        data,
+        st.session_state.data_version,
+        st.session_state.selected_years,
+        st.session_state.selected_town,
+        st.session_state.selected_flat_type,
+        get_map_ignored_filters(data, {key: st.session_state[key] for key in FILTER_KEYS})
+    )
+
+    st.subheader("Comparable Transactions")
+    display_comparables(data, st.session_state.data_version)
+
+    st.subheader("Price Estimate")
+    display_price_estimate(data, st.session_state.data_version)
 
 if __name__ == "__main__":
     display()
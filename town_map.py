@@ -0,0 +1,137 @@
+# filename: town_map.py
+import numpy as np
+import pandas as pd
+from analytics import month_ordinals
+
+# """
+# This file contains the data behind the explorer's town price map. Town coordinates come from
+# an offline table shipped with the app, so no geocoding happens at request time. Transactions
+# are aggregated once per dataset version into (town, flat_type, year) cells holding counts and
+# sums; any filter on those keys is then a re-aggregation of a few thousand cells, not of the
+# raw transactions, and the map receives one row per town. Because cells are sums, a data
+# update applies its snapshot diff to the previous cells instead of aggregating every row again.
+# """
+
+# Approximate centre of each HDB town as (latitude, longitude)
+TOWN_COORDINATES = {
+    'ANG MO KIO': (1.3691, 103.8454),
+    'BEDOK': (1.3236, 103.9273),
+    'BISHAN': (1.3526, 103.8352),
+    'BUKIT BATOK': (1.3590, 103.7637),
+    'BUKIT MERAH': (1.2819, 103.8239),
+    'BUKIT PANJANG': (1.3774, 103.7719),
+    'BUKIT TIMAH': (1.3294, 103.8021),
+    'CENTRAL AREA': (1.2867, 103.8519),
+    'CHOA CHU KANG': (1.3840, 103.7470),
+    'CLEMENTI': (1.3162, 103.7649),
+    'GEYLANG': (1.3201, 103.8918),
+    'HOUGANG': (1.3612, 103.8863),
+    'JURONG EAST': (1.3329, 103.7436),
+    'JURONG WEST': (1.3404, 103.7090),
+    'KALLANG/WHAMPOA': (1.3245, 103.8624),
+    'LIM CHU KANG': (1.4305, 103.7174),
+    'MARINE PARADE': (1.3020, 103.8971),
+    'PASIR RIS': (1.3721, 103.9474),
+    'PUNGGOL': (1.3984, 103.9072),
+    'QUEENSTOWN': (1.2942, 103.7861),
+    'SEMBAWANG': (1.4491, 103.8185),
+    'SENGKANG': (1.3868, 103.8914),
+    'SERANGOON': (1.3554, 103.8679),
+    'TAMPINES': (1.3496, 103.9568),
+    'TENGAH': (1.3544, 103.7294),
+    'TOA PAYOH': (1.3343, 103.8563),
+    'WOODLANDS': (1.4382, 103.7890),
+    'YISHUN': (1.4304, 103.8354),
+}
+
+# Centre of Singapore, used as the map's initial view
+MAP_CENTRE = (1.3521, 103.8198)
+
+
+# Keys and additive values of a town price cell
+CELL_KEYS = ['town', 'flat_type', 'year']
+CELL_VALUES = ['transactions', 'price_sum', 'area_sum']
+
+
+# Function to aggregate transactions into (town, flat_type, year) cells of counts and sums
+def _aggregate_cells(data):
+    months = month_ordinals(data['month'])
+    price = data['resale_price'].to_numpy(dtype=float)
+    area = data['floor_area_sqm'].to_numpy(dtype=float)
+    # Unknown months, prices and floor areas are filled with placeholders during ingest
+    keep = (months >= 0) & (price > 0) & (area > 0)
+
+    frame = pd.DataFrame({
+        'town': data['town'].to_numpy()[keep].astype(str),
+        'flat_type': data['flat_type'].to_numpy()[keep].astype(str),
+        'year': months[keep] // 12,
+        'price': price[keep],
+        'area': area[keep],
+    })
+    # Counts and sums combine exactly when cells are re-aggregated, unlike medians
+    return frame.groupby(CELL_KEYS).agg(
+        transactions=('price', 'size'),
+        price_sum=('price', 'sum'),
+        area_sum=('area', 'sum'),
+    ).reset_index()
+
+
+# Function to join cells to their town coordinates
+def _with_coordinates(cells):
+    coordinates = pd.DataFrame(
+        [(town, lat, lon) for town, (lat, lon) in TOWN_COORDINATES.items()],
+        columns=['town', 'latitude', 'longitude']
+    )
+    return cells.merge(coordinates, on='town', how='left')
+
+
+# Function to aggregate transactions into (town, flat_type, year) cells joined to town coordinates
+def town_price_cells(data):
+    return _with_coordinates(_aggregate_cells(data))
+
+
+# Function to update the cells of a previous snapshot with the transactions added and removed since
+def update_town_price_cells(cells, added, removed):
+    # Removed transactions are subtracted by adding their cells with negated counts and sums
+    removed_cells = _aggregate_cells(removed)
+    removed_cells[CELL_VALUES] = -removed_cells[CELL_VALUES]
+    combined = pd.concat(
+        [cells[CELL_KEYS + CELL_VALUES], _aggregate_cells(added), removed_cells], ignore_index=True
+    ).groupby(CELL_KEYS).sum().reset_index()
+    # Cells whose transactions were all removed disappear, as they would in a full rebuild
+    combined = combined[combined['transactions'] > 0].reset_index(drop=True)
+    return _with_coordinates(combined)
+
+
+# Function to re-aggregate the cells matching the filters to one row per town
+def town_price_summary(cells, years=None, towns=None, flat_types=None):
+    selected = cells
+    if years:
+        selected = selected[selected['year'].between(*years)]
+    if towns:
+        selected = selected[selected['town'].isin(towns)]
+    if flat_types:
+        selected = selected[selected['flat_type'].isin(flat_types)]
+
+    summary = selected.groupby(['town', 'latitude', 'longitude'], dropna=False).agg(
+        transactions=('transactions', 'sum'),
+        price_sum=('price_sum', 'sum'),
+        area_sum=('area_sum', 'sum'),
+    ).reset_index()
+    summary['average_price'] = summary['price_sum'] / summary['transactions']
+    summary['price_per_sqm'] = summary['price_sum'] / summary['area_sum']
+    return summary.drop(columns=['price_sum', 'area_sum'])
+
+
+# Function to map values to colours from yellow (lowest) to red (highest), with their position 0-1
+def price_colours(values):
+    values = np.asarray(values, dtype=float)
+    span = values.max() - values.min() if len(values) else 0
+    position = (values - values.min()) / span if span > 0 else np.zeros(len(values))
+    colours = np.column_stack([
+        np.full(len(values), 255),
+        (220 * (1 - position)).astype(int),
+        np.zeros(len(values), dtype=int),
+        np.full(len(values), 200),
+    ])
+    return colours.tolist(), position
@@ -2,10 +2,13 @@
 import streamlit as st  
 import random  
 import hmac  
+import uuid
+import os
   
 # """  
 # This file contains the common components used in the Streamlit App.  
-# This includes the sidebar, the title, the footer, and the password check.  
+# This includes the sidebar, the title, the footer, the password check, the session id and
+# integer settings read from the environment.  
 # """  
   
   
@@ -27,4 +30,18 @@ def check_password():
     )  
     if "password_correct" in st.session_state:  
         st.error("😕 Password incorrect")  
-    return False
\ No newline at end of file
+    return False
+
+
+# Function to get an id for the current browser session, used to account for its memory
+def get_session_id():
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = uuid.uuid4().hex
+    return st.session_state["session_id"]
+
+
+
+# Function to read an integer setting from the environment
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default